@@ -1,29 +1,84 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from .export import export_lines
 from .models import Category, Comment, Location, Post
 
 admin.site.empty_value_display = 'Не задано'
 
+COMMENT_EXCERPT = 50
+
+CONTENT_TYPES = {
+    'jsonl': 'application/jsonl; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _export_response(queryset, fmt):
+    response = StreamingHttpResponse(
+        export_lines(queryset, fmt), content_type=CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{queryset.model._meta.model_name}.{fmt}"'
+    )
+    return response
+
+
+@admin.action(description='Выгрузить выбранные в JSONL')
+def export_jsonl(modeladmin, request, queryset):
+    return _export_response(queryset, 'jsonl')
+
+
+@admin.action(description='Выгрузить выбранные в CSV')
+def export_csv(modeladmin, request, queryset):
+    return _export_response(queryset, 'csv')
+
 
 class PostInline(admin.StackedInline):
     model = Post
 
+    def get_queryset(self, request):
+        # views пишет blog.counters: сохранение формы его не трогает.
+        return super().get_queryset(request).defer('views')
+
 
 class CategoryAdmin(admin.ModelAdmin):
     inlines = (
         PostInline,
     )
+    actions = (export_jsonl, export_csv)
 
 
 class LocationAdmin(admin.ModelAdmin):
     inlines = (
         PostInline,
     )
+    actions = (export_jsonl, export_csv)
 
 
 class CommentAdmin(admin.ModelAdmin):
-    model = Comment
-    extra = 0
+    list_display = (
+        'post',
+        'author',
+        'created_at',
+        'excerpt',
+    )
+    list_select_related = (
+        'post',
+        'author',
+    )
+    list_filter = ('created_at',)
+    date_hierarchy = 'created_at'
+    search_fields = ('text',)
+    raw_id_fields = (
+        'post',
+        'author',
+    )
+    actions = (export_jsonl, export_csv)
+
+    @admin.display(description='Текст комментария')
+    def excerpt(self, obj):
+        return obj.text[:COMMENT_EXCERPT]
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -44,6 +99,10 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     list_filter = ('is_published',)
     list_display_links = ('title',)
+    actions = (export_jsonl, export_csv)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('views')
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,374 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from blog.cache_tags import FEED, post_tags, tag
+from blog.imports import MAX_BATCH, import_posts
+from blog.models import Comment, Post, User
+from blog.registry import categories
+from core import cache
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+# Опубликованные по расписанию посты появляются без сигналов моделей.
+CACHE_TIMEOUT = 60
+
+# Поле ответа -> столбцы values(); id, pub_date и ключи связей
+# выбираются всегда: по ним строятся курсор и теги кеша.
+POST_FIELDS = {
+    'id': (),
+    'title': ('title',),
+    'text': ('text',),
+    'pub_date': (),
+    'author': ('author__username',),
+    'category': ('category__slug',),
+    'location': ('location__name', 'location__is_published'),
+    'image': ('image',),
+    'comment_count': (),
+    'url': (),
+}
+POST_KEYS = ('id', 'pub_date', 'author_id', 'category_id', 'location_id')
+COMMENT_FIELDS = {
+    'id': (),
+    'text': ('text',),
+    'created_at': (),
+    'author': ('author__username',),
+}
+COMMENT_KEYS = ('id', 'created_at', 'author_id')
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def encode_cursor(value, pk):
+    raw = json.dumps([value.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        value = parse_datetime(value)
+    except (ValueError, TypeError):
+        value = None
+    if value is None or not isinstance(pk, int):
+        raise ApiError(400, 'Некорректный cursor.')
+    return value, pk
+
+
+def parse_fields(request, allowed):
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(allowed)
+    fields = [name for name in requested.split(',') if name]
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ApiError(400, 'Неизвестные поля: ' + ', '.join(sorted(unknown)))
+    return fields
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def select(queryset, fields, field_map, keys):
+    '''Только столбцы выбранных полей: values() без лишних JOIN.'''
+    columns = set(keys)
+    for name in fields:
+        columns.update(field_map[name])
+    if 'comment_count' in fields:
+        queryset = queryset.annotate(comment_count=Count('comments'))
+        columns.add('comment_count')
+    return queryset.values(*columns)
+
+
+def post_row(row, fields):
+    result = {}
+    for name in fields:
+        if name == 'author':
+            result[name] = row['author__username']
+        elif name == 'category':
+            result[name] = row['category__slug']
+        elif name == 'location':
+            result[name] = (
+                row['location__name'] if row['location__is_published']
+                else None
+            )
+        elif name == 'image':
+            result[name] = (
+                settings.MEDIA_URL + row['image'] if row['image'] else None
+            )
+        elif name == 'url':
+            result[name] = reverse('blog:post_detail', args=[row['id']])
+        else:
+            result[name] = row[name]
+    return result
+
+
+def comment_row(row, fields):
+    return {
+        name: row['author__username'] if name == 'author' else row[name]
+        for name in fields
+    }
+
+
+def row_tags(row):
+    return post_tags(Post(
+        pk=row['id'], author_id=row['author_id'],
+        category_id=row['category_id'], location_id=row['location_id'],
+    ))
+
+
+class ApiView(View):
+    '''Базовое представление API: JSON, кеш с тегами и ETag.
+
+    Параметры запроса разбираются до обращения к кешу: ключ строится
+    из разобранных fields, limit и cursor, так что порядок и лишние
+    параметры адреса не плодят копий. Ответ хранится в core.cache
+    с тегами показанных объектов; повторный опрос с If-None-Match
+    получает 304 без обращения к БД.
+    '''
+
+    field_map = POST_FIELDS
+    paginated = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.parse(request)
+            key = 'api:{}:{}:{}:{}:{}'.format(
+                request.path, ','.join(self.fields), self.limit,
+                self.cursor and '{},{}'.format(
+                    self.cursor[0].isoformat(), self.cursor[1]
+                ),
+                request.user.pk or 0,
+            )
+            cached = cache.get(key)
+            if cached is None:
+                payload, tags = self.build(request, **kwargs)
+                body = json.dumps(payload, cls=DjangoJSONEncoder,
+                                  ensure_ascii=False)
+                etag = '"{}"'.format(hashlib.md5(body.encode()).hexdigest())
+                cached = (body, etag)
+                cache.set(key, cached, tags=tags, timeout=CACHE_TIMEOUT)
+        except ApiError as error:
+            return JsonResponse({'detail': error.detail},
+                                status=error.status)
+        except Http404:
+            return JsonResponse({'detail': 'Не найдено.'}, status=404)
+        body, etag = cached
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Vary'] = 'Cookie'
+        return response
+
+    def parse(self, request):
+        '''Разбирает fields, limit и cursor в атрибуты представления.'''
+        self.fields = parse_fields(request, self.field_map)
+        self.limit = self.cursor = None
+        if self.paginated:
+            self.limit = parse_limit(request)
+            if 'cursor' in request.GET:
+                self.cursor = decode_cursor(request.GET['cursor'])
+
+    def build(self, request, **kwargs):
+        '''Возвращает данные ответа и теги для кеша.'''
+        raise NotImplementedError
+
+    def next_url(self, request, cursor):
+        '''Адрес следующей страницы только из разобранных параметров.'''
+        query = {}
+        if self.fields != list(self.field_map):
+            query['fields'] = ','.join(self.fields)
+        if self.limit != DEFAULT_LIMIT:
+            query['limit'] = self.limit
+        query['cursor'] = cursor
+        return f'{request.path}?{urlencode(query)}'
+
+
+class PostListApiView(ApiView):
+    '''Лента постов: курсор по (pub_date, id) от новых к старым.'''
+
+    def get_queryset(self, request, **kwargs):
+        return Post.objects.published(), {FEED}
+
+    def build(self, request, **kwargs):
+        queryset, tags = self.get_queryset(request, **kwargs)
+        if self.cursor:
+            pub_date, pk = self.cursor
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        rows = list(select(
+            queryset.order_by('-pub_date', '-pk'), self.fields, POST_FIELDS,
+            POST_KEYS,
+        )[:self.limit + 1])
+        page = rows[:self.limit]
+        for row in page:
+            tags |= row_tags(row)
+        last = page[-1] if len(rows) > self.limit else None
+        return {
+            'results': [post_row(row, self.fields) for row in page],
+            'next': last and self.next_url(
+                request, encode_cursor(last['pub_date'], last['id'])
+            ),
+        }, tags
+
+
+class CategoryPostListApiView(PostListApiView):
+    '''Посты опубликованной категории.'''
+
+    def get_queryset(self, request, category_slug):
+        category = categories.get(slug=category_slug)
+        if category is None or not category.is_published:
+            raise Http404
+        return Post.objects.published().filter(category=category), {
+            FEED, tag('category', category.pk),
+        }
+
+
+class AuthorPostListApiView(PostListApiView):
+    '''Посты автора; автор видит и неопубликованные.'''
+
+    def get_queryset(self, request, username):
+        author = get_object_or_404(User, username=username)
+        queryset = Post.objects.filter(author=author)
+        if request.user != author:
+            queryset = queryset.published()
+        return queryset, {FEED, tag('user', author.pk)}
+
+
+class PostApiView(ApiView):
+    '''Отдельный пост по правилам PostDetailView.'''
+
+    paginated = False
+
+    def build(self, request, post_id):
+        post = get_object_or_404(
+            Post.objects.select_related('author', 'category'), pk=post_id
+        )
+        if not post.is_visible_to(request.user):
+            raise Http404
+        row = select(
+            Post.objects.filter(pk=post_id), self.fields, POST_FIELDS,
+            POST_KEYS,
+        ).get()
+        return post_row(row, self.fields), row_tags(row)
+
+
+class CommentListApiView(ApiView):
+    '''Комментарии видимого поста: курсор по (created_at, id).'''
+
+    field_map = COMMENT_FIELDS
+
+    def build(self, request, post_id):
+        post = get_object_or_404(
+            Post.objects.select_related('author', 'category'), pk=post_id
+        )
+        if not post.is_visible_to(request.user):
+            raise Http404
+        queryset = Comment.objects.filter(post=post)
+        if self.cursor:
+            created_at, pk = self.cursor
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at)
+                | Q(created_at=created_at, pk__gt=pk)
+            )
+        rows = list(select(
+            queryset.order_by('created_at', 'pk'), self.fields,
+            COMMENT_FIELDS, COMMENT_KEYS,
+        )[:self.limit + 1])
+        page = rows[:self.limit]
+        tags = post_tags(post)
+        for row in page:
+            tags.add(tag('user', row['author_id']))
+        last = page[-1] if len(rows) > self.limit else None
+        return {
+            'results': [comment_row(row, self.fields) for row in page],
+            'next': last and self.next_url(
+                request, encode_cursor(last['created_at'], last['id'])
+            ),
+        }, tags
+
+
+def basic_auth(request):
+    '''Пользователь из заголовка Authorization: Basic или None.'''
+    scheme, _, credentials = request.headers.get(
+        'Authorization', ''
+    ).partition(' ')
+    if scheme.lower() != 'basic':
+        return None
+    try:
+        username, _, password = base64.b64decode(
+            credentials
+        ).decode().partition(':')
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    return authenticate(request, username=username, password=password)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PostImportApiView(View):
+    '''Пакетный импорт постов партнёров: POST со списком объектов JSON.
+
+    Автор постов — пользователь из HTTP Basic или сессии. Вид освобождён
+    от CSRF ради Basic-клиентов; запрос с сессией проходит через
+    csrf_protect, как обычная форма.
+    '''
+
+    http_method_names = ['post']
+
+    def post(self, request):
+        if 'Authorization' in request.headers:
+            return self.import_for(request, basic_auth(request))
+        return csrf_protect(self.session_import)(request)
+
+    def session_import(self, request):
+        return self.import_for(request, request.user)
+
+    def import_for(self, request, user):
+        if user is None or not user.is_authenticated:
+            response = JsonResponse(
+                {'detail': 'Требуется авторизация.'}, status=401
+            )
+            response['WWW-Authenticate'] = 'Basic realm="blogicum"'
+            return response
+        try:
+            items = json.loads(request.body)
+        except ValueError:
+            items = None
+        if not isinstance(items, list) or not 0 < len(items) <= MAX_BATCH:
+            return JsonResponse({
+                'detail': f'Ожидается список из 1..{MAX_BATCH} постов.'
+            }, status=400)
+        results = import_posts(items, user)
+        return JsonResponse({
+            'created': sum('id' in result for result in results),
+            'results': results,
+        }, json_dumps_params={'ensure_ascii': False})
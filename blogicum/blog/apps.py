@@ -1,7 +1,31 @@
 from django.apps import AppConfig
+from django.core.checks import register
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from blog import (
+            cache_tags, category_stats, checks, post_state, registry, timeline,
+            trending,
+        )
+        from blog.streams import publish_comment
+        from core.counters import flushed
+        from core.sqlite import apply_pragmas
+        register(checks.cached_auth)
+        connection_created.connect(apply_pragmas)
+        cache_tags.connect()
+        registry.connect()
+        post_state.connect()
+        category_stats.connect()
+        post_save.connect(publish_comment, sender=self.get_model('Comment'))
+        post_save.connect(
+            trending.comment_created, sender=self.get_model('Comment')
+        )
+        flushed.connect(trending.views_flushed)
+        post_save.connect(timeline.post_saved, sender=self.get_model('Post'))
@@ -0,0 +1,48 @@
+import functools
+
+from blog import views
+from core import executor
+
+
+def _respond(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if response.streaming:
+        # ASGIHandler Django 3.2 перебирает потоковый ответ прямо в
+        # цикле событий, а карточки постов читают БД: собираем здесь.
+        response.streaming_content = list(response.streaming_content)
+    return response
+
+
+class AsyncReadMixin:
+    '''Mixin: асинхронное представление для ASGI.
+
+    Запросы к ORM и рендеринг выполняются в ограниченном пуле
+    core.executor, цикл событий не ждёт базу данных.
+    '''
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await executor.run(
+                _respond, view, request, *args, **kwargs
+            )
+
+        return functools.update_wrapper(async_view, view)
+
+
+class IndexListView(AsyncReadMixin, views.IndexListView):
+    '''Главная страница.'''
+
+
+class CategoryListView(AsyncReadMixin, views.CategoryListView):
+    '''Страница отдельной категории.'''
+
+
+class ProfileListView(AsyncReadMixin, views.ProfileListView):
+    '''Страница профиля пользователя.'''
+
+
+class PostDetailView(AsyncReadMixin, views.PostDetailView):
+    '''Страница отдельного поста.'''
@@ -0,0 +1,32 @@
+from django.contrib.auth.backends import ModelBackend
+
+from blog.cache_tags import tag
+from core import cache
+
+
+def user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    '''ModelBackend, который берёт пользователя сессии из core.cache.
+
+    Запись помечена тегом user:<id>: сохранение профиля, смена пароля и
+    отключение сбрасывают её через сигналы blog.cache_tags, выход —
+    forget(). User.objects.update() сигналов не отправляет: после него
+    нужен cache.invalidate(tag('user', pk)). Работает только с общим
+    кешем (проверка blog.E001).
+    '''
+
+    def get_user(self, user_id):
+        load = super().get_user
+        return cache.get_or_set(
+            user_key(user_id), lambda: load(user_id),
+            tags=[tag('user', user_id)],
+        )
+
+
+def forget(sender, user=None, **kwargs):
+    '''user_logged_out: следующий вход прочитает пользователя из БД.'''
+    if user is not None:
+        cache.delete(user_key(user.pk))
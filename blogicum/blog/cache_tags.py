@@ -0,0 +1,57 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+
+from blog.models import Category, Comment, Location, Post, User
+from core import cache
+
+FEED = 'feed'
+
+
+def tag(model_name, pk):
+    return f'{model_name}:{pk}'
+
+
+def post_tags(post):
+    '''Теги карточки и страницы поста: всё, что на них выводится.'''
+    tags = {tag('post', post.pk), tag('user', post.author_id)}
+    if post.category_id:
+        tags.add(tag('category', post.category_id))
+    if post.location_id:
+        tags.add(tag('location', post.location_id))
+    return tags
+
+
+def page_tags(posts, *extra):
+    '''Теги страницы ленты: FEED и теги каждой карточки на ней.'''
+    tags = {FEED, *extra}
+    for post in posts:
+        tags |= post_tags(post)
+    return tags
+
+
+def post_changed(sender, instance, **kwargs):
+    # Страницы лент помечены FEED, поэтому пост, перенесённый в другую
+    # категорию, пропадёт и со страницы прежней категории.
+    cache.invalidate(FEED, *post_tags(instance))
+
+
+def comment_changed(sender, instance, **kwargs):
+    cache.invalidate(tag('post', instance.post_id))
+
+
+def model_changed(sender, instance, **kwargs):
+    '''Category, Location и User: сброс всех записей с их тегом.'''
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+    cache.invalidate(tag(sender._meta.model_name, instance.pk))
+
+
+def connect():
+    from blog.backends import forget
+
+    user_logged_out.connect(forget)
+    for signal in (post_save, post_delete):
+        signal.connect(post_changed, sender=Post)
+        signal.connect(comment_changed, sender=Comment)
+        for model in (Category, Location, User):
+            signal.connect(model_changed, sender=model)
@@ -0,0 +1,201 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Min, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.template import engines
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from blog import post_state
+from blog.models import Category, CategoryStats, Post
+from core import cache
+from core.retry import retry_write
+
+TAG = 'category_stats'
+TEMPLATE = 'includes/category_sidebar.html'
+
+
+def changes(pairs, now):
+    '''Приращения счётчиков и ближайшие отложенные посты по категориям.
+
+    pairs — пары состояний поста (до, после); None — поста нет.
+    '''
+    deltas, scheduled = defaultdict(int), {}
+    for old, new in pairs:
+        for sign, current in ((-1, old), (1, new)):
+            if current is None:
+                continue
+            category_id, is_published, pub_date = current
+            if category_id is None or not is_published:
+                continue
+            if pub_date <= now:
+                deltas[category_id] += sign
+            elif sign > 0:
+                scheduled[category_id] = min(
+                    pub_date, scheduled.get(category_id, pub_date)
+                )
+    return {pk: delta for pk, delta in deltas.items() if delta}, scheduled
+
+
+def apply(pairs):
+    '''Переносит изменения постов в счётчики одной транзакцией записи.
+
+    Счётчики меняются UPDATE с F(): параллельные сохранения не теряют
+    приращений. Отложенный пост только сдвигает next_pub_date; если она
+    уже наступила, категория пересчитывается целиком.
+    '''
+    now = timezone.now()
+    deltas, scheduled = changes(pairs, now)
+    touched = {*deltas, *scheduled}
+    if not touched:
+        return
+
+    @retry_write(name='category_stats.apply')
+    def write():
+        CategoryStats.objects.bulk_create([
+            CategoryStats(category_id=pk) for pk in touched
+        ], ignore_conflicts=True)
+        for pk, delta in deltas.items():
+            CategoryStats.objects.filter(category_id=pk).update(
+                post_count=F('post_count') + delta
+            )
+        for pk, pub_date in scheduled.items():
+            CategoryStats.objects.filter(category_id=pk).update(
+                next_pub_date=Case(
+                    When(
+                        next_pub_date__lt=pub_date, then=F('next_pub_date')
+                    ),
+                    default=Value(pub_date),
+                )
+            )
+        catch_up(now, touched)
+    write()
+    transaction.on_commit(lambda: cache.invalidate(TAG))
+
+
+def added(posts):
+    '''Счётчики для постов из bulk_create: он не отправляет сигналы.'''
+    apply([(None, post_state.state(post)) for post in posts])
+
+
+def recount(category_ids=None, now=None):
+    '''Пересчитывает счётчики одним GROUP BY; возвращает число правок.
+
+    Без category_ids пересчитываются все категории: так исправляется
+    расхождение после загрузки данных в обход сигналов.
+    '''
+    now = now or timezone.now()
+    posts = Post.objects.filter(is_published=True, category__isnull=False)
+    stats = CategoryStats.objects.all()
+    if category_ids is None:
+        category_ids = Category.objects.values_list('pk', flat=True)
+    else:
+        posts = posts.filter(category__in=category_ids)
+        stats = stats.filter(category__in=category_ids)
+    fresh = {
+        row['category']: (row['post_count'], row['next_pub_date'])
+        for row in posts.values('category').annotate(
+            post_count=Count('pk', filter=Q(pub_date__lte=now)),
+            next_pub_date=Min('pub_date', filter=Q(pub_date__gt=now)),
+        )
+    }
+    existing = {row.category_id: row for row in stats}
+    created, changed = [], []
+    for pk in category_ids:
+        post_count, next_pub_date = fresh.get(pk, (0, None))
+        row = existing.get(pk)
+        if row is None:
+            created.append(CategoryStats(
+                category_id=pk, post_count=post_count,
+                next_pub_date=next_pub_date,
+            ))
+        elif (row.post_count, row.next_pub_date) != (
+            post_count, next_pub_date
+        ):
+            row.post_count, row.next_pub_date = post_count, next_pub_date
+            changed.append(row)
+
+    @retry_write(name='category_stats.recount')
+    def write():
+        CategoryStats.objects.bulk_create(
+            created, batch_size=500, ignore_conflicts=True
+        )
+        CategoryStats.objects.bulk_update(
+            changed, ('post_count', 'next_pub_date'), batch_size=500
+        )
+    if created or changed:
+        write()
+        transaction.on_commit(lambda: cache.invalidate(TAG))
+    return len(created) + len(changed)
+
+
+def catch_up(now=None, category_ids=None):
+    '''Пересчитывает категории, отложенные посты которых уже вышли.'''
+    now = now or timezone.now()
+    due = CategoryStats.objects.filter(next_pub_date__lte=now)
+    if category_ids is not None:
+        due = due.filter(category__in=category_ids)
+    due = list(due.values_list('category', flat=True))
+    if due:
+        recount(due, now)
+
+
+def sidebar(using):
+    '''(срок годности, HTML) навигации по опубликованным категориям.'''
+    now = timezone.now()
+    catch_up(now)
+    categories = list(Category.objects.filter(
+        is_published=True, stats__isnull=False,
+    ).annotate(
+        post_count=F('stats__post_count'),
+        next_pub_date=F('stats__next_pub_date'),
+    ).order_by('title'))
+    expires = min(
+        (category.next_pub_date for category in categories
+         if category.next_pub_date),
+        default=None,
+    )
+    html = engines[using].get_template(TEMPLATE).render({'categories': [
+        category for category in categories if category.post_count
+    ]})
+    return expires, html
+
+
+def render(using='django'):
+    '''Фрагмент навигации по категориям из кеша core.cache.
+
+    Кеш сбрасывается по тегу TAG при изменении счётчиков и категорий,
+    а также устаревает к дате ближайшего отложенного поста.
+    '''
+    key = f'category_sidebar:{using}'
+    expires, html = cache.get_or_set(
+        key, lambda: sidebar(using), tags=[TAG]
+    )
+    if expires is not None and expires <= timezone.now():
+        cache.delete(key)
+        expires, html = cache.get_or_set(
+            key, lambda: sidebar(using), tags=[TAG]
+        )
+    return mark_safe(html)
+
+
+def post_saved(sender, instance, raw=False, **kwargs):
+    old = post_state.previous(instance)
+    if not raw and old is not post_state.UNCHANGED:
+        apply([(old, post_state.state(instance))])
+
+
+def post_deleted(sender, instance, **kwargs):
+    apply([(post_state.state(instance), None)])
+
+
+def category_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache.invalidate(TAG))
+
+
+def connect():
+    post_save.connect(post_saved, sender=Post)
+    post_delete.connect(post_deleted, sender=Post)
+    for signal in (post_save, post_delete):
+        signal.connect(category_changed, sender=Category)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.checks import Error
+
+from core.cache import is_shared
+
+CACHED_BACKEND = 'blog.backends.CachedModelBackend'
+CACHED_SESSIONS = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def cached_auth(app_configs, **kwargs):
+    '''Кеш сессий и пользователя сессии требует общего бэкенда кеша.
+
+    С кешем процесса смена пароля или отключение пользователя в одном
+    воркере не видны другим: отозванная сессия продолжает работать.
+    '''
+    errors = []
+    if CACHED_BACKEND in settings.AUTHENTICATION_BACKENDS and not is_shared():
+        errors.append(Error(
+            f'{CACHED_BACKEND} требует общего кеша в TAGGED_CACHE.',
+            hint='Настройте Memcached или Redis либо уберите бэкенд.',
+            id='blog.E001',
+        ))
+    if settings.SESSION_ENGINE in CACHED_SESSIONS and not is_shared(
+        settings.SESSION_CACHE_ALIAS
+    ):
+        errors.append(Error(
+            f'{settings.SESSION_ENGINE} требует общего кеша в '
+            'SESSION_CACHE_ALIAS.',
+            hint='Настройте Memcached или Redis либо сессии в БД.',
+            id='blog.E002',
+        ))
+    return errors
@@ -0,0 +1,4 @@
+from blog.models import Post
+from core.counters import CounterBuffer
+
+post_views = CounterBuffer('post_views', Post, 'views')
@@ -0,0 +1,135 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Category, Comment, Location, Post
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    '''Псевдо-файл для csv.writer: возвращает строку вместо записи.'''
+
+    def write(self, value):
+        return value
+
+
+def _post_row(post):
+    return {
+        'id': post.id,
+        'title': post.title,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'is_published': post.is_published,
+        'created_at': post.created_at,
+        'author': post.author.username,
+        'category': post.category.slug if post.category else None,
+        'location': post.location.name if post.location else None,
+    }
+
+
+def _comment_row(comment):
+    return {
+        'id': comment.id,
+        'post_id': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created_at': comment.created_at,
+    }
+
+
+def _category_row(category):
+    return {
+        'id': category.id,
+        'title': category.title,
+        'slug': category.slug,
+        'description': category.description,
+        'is_published': category.is_published,
+        'created_at': category.created_at,
+    }
+
+
+def _location_row(location):
+    return {
+        'id': location.id,
+        'name': location.name,
+        'is_published': location.is_published,
+        'created_at': location.created_at,
+    }
+
+
+# Модель -> (связанные поля для select_related, функция строки, колонки).
+EXPORTS = {
+    Post: (
+        ('author', 'category', 'location'), _post_row,
+        ('id', 'title', 'text', 'pub_date', 'is_published', 'created_at',
+         'author', 'category', 'location'),
+    ),
+    Comment: (
+        ('author',), _comment_row,
+        ('id', 'post_id', 'author', 'text', 'created_at'),
+    ),
+    Category: (
+        (), _category_row,
+        ('id', 'title', 'slug', 'description', 'is_published', 'created_at'),
+    ),
+    Location: (
+        (), _location_row,
+        ('id', 'name', 'is_published', 'created_at'),
+    ),
+}
+
+MODELS = {model._meta.model_name: model for model in EXPORTS}
+
+
+def iter_rows(queryset, after_pk=None, until_pk=None, chunk_size=CHUNK_SIZE):
+    '''Строки экспорта по возрастанию pk, без загрузки всей таблицы.'''
+    related, to_row, _ = EXPORTS[queryset.model]
+    if after_pk is not None:
+        queryset = queryset.filter(pk__gt=after_pk)
+    if until_pk is not None:
+        queryset = queryset.filter(pk__lte=until_pk)
+    queryset = queryset.select_related(*related).order_by('pk')
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield to_row(obj)
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows, model, header=True):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORTS[model][2])
+    if header:
+        yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(queryset, fmt, header=True, **kwargs):
+    rows = iter_rows(queryset, **kwargs)
+    if fmt == 'csv':
+        return csv_lines(rows, queryset.model, header=header)
+    return jsonl_lines(rows)
+
+
+def resume_jsonl(path):
+    '''Готовит JSONL-файл к продолжению экспорта.
+
+    Отрезает недописанную последнюю строку и возвращает pk последней
+    полной строки (None, если файл пуст).
+    '''
+    with open(path, 'rb+') as fh:
+        fh.seek(0, 2)
+        size = fh.tell()
+        start = max(size - 65536, 0)
+        fh.seek(start)
+        tail = fh.read()
+        end = tail.rfind(b'\n') + 1
+        if not end and start:
+            raise ValueError(f'Не найдено конца строки в хвосте {path}')
+        fh.truncate(start + end)
+    lines = tail[:end].decode('utf-8', errors='ignore').splitlines()
+    return json.loads(lines[-1])['id'] if lines and lines[-1] else None
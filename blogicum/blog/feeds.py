@@ -0,0 +1,169 @@
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe
+
+from blog.cache_tags import FEED, page_tags, tag
+from blog.models import Post, User
+from blog.registry import categories, with_cached_relations
+from core import cache
+
+# Опубликованные по расписанию посты появляются без сигналов моделей.
+CACHE_TIMEOUT = 60
+
+
+class CachedFeed(Feed):
+    '''Лента RSS с кешем по тегам и условным GET.
+
+    Готовый XML хранится в core.cache с тегами показанных постов;
+    запрос с совпавшим If-None-Match или If-Modified-Since получает
+    304 без обращения к БД. Last-Modified учитывает и правки постов
+    (updated_at), не только даты публикации. Экземпляр создаётся на
+    каждый запрос (as_view), чтобы собирать теги в self.tags.
+    '''
+
+    limit = 20
+    description = 'Новые публикации Блогикума'
+
+    @classmethod
+    def as_view(cls):
+        def view(request, *args, **kwargs):
+            return cls()(request, *args, **kwargs)
+        return view
+
+    def __call__(self, request, *args, **kwargs):
+        # Ссылки в ленте абсолютные: схема и хост входят в ключ.
+        key = f'feed:{request.scheme}://{request.get_host()}{request.path}'
+        cached = cache.get(key)
+        if cached is None:
+            self.tags = {FEED}
+            response = super().__call__(request, *args, **kwargs)
+            cached = (
+                response.content,
+                response['Content-Type'],
+                response.get('Last-Modified'),
+                '"{}"'.format(hashlib.md5(response.content).hexdigest()),
+            )
+            cache.set(key, cached, tags=self.tags, timeout=CACHE_TIMEOUT)
+        content, content_type, last_modified, etag = cached
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=last_modified and parse_http_date_safe(
+                last_modified
+            ),
+        )
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = last_modified
+        return response
+
+    def get_queryset(self, obj):
+        return Post.objects.published()
+
+    def items(self, obj):
+        posts = list(with_cached_relations(
+            self.get_queryset(obj).select_related('author')
+        ).order_by('-pub_date', '-pk')[:self.limit])
+        self.tags |= page_tags(posts)
+        return posts
+
+    def link(self, obj):
+        return reverse('blog:index')
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        # Last-Modified ленты — наибольшая из дат постов: правка
+        # опубликованного поста тоже меняет ленту.
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.category.title] if item.category else []
+
+
+class AtomFeedMixin:
+    '''Та же лента в формате Atom.'''
+
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class PostsFeed(CachedFeed):
+    title = 'Блогикум'
+
+
+class CategoryFeed(CachedFeed):
+
+    def get_object(self, request, category_slug):
+        category = categories.get(slug=category_slug)
+        if category is None or not category.is_published:
+            raise Http404
+        self.tags.add(tag('category', category.pk))
+        return category
+
+    def get_queryset(self, category):
+        return Post.objects.published().filter(category=category)
+
+    def title(self, category):
+        return f'Блогикум: {category.title}'
+
+    def description(self, category):
+        return category.description
+
+    def link(self, category):
+        return reverse('blog:category_posts', args=[category.slug])
+
+
+class AuthorFeed(CachedFeed):
+
+    def get_object(self, request, username):
+        author = get_object_or_404(User, username=username)
+        self.tags.add(tag('user', author.pk))
+        return author
+
+    def get_queryset(self, author):
+        # Лента публичная: неопубликованные посты не видны и автору.
+        return Post.objects.published().filter(author=author)
+
+    def title(self, author):
+        return f'Блогикум: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Публикации пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('blog:profile', args=[author.username])
+
+
+class PostsAtomFeed(AtomFeedMixin, PostsFeed):
+    pass
+
+
+class CategoryAtomFeed(AtomFeedMixin, CategoryFeed):
+    pass
+
+
+class AuthorAtomFeed(AtomFeedMixin, AuthorFeed):
+    pass
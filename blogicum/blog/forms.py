@@ -38,3 +38,14 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class PostImportForm(PostForm):
+    '''Правила PostForm для пакетного импорта (blog.imports).
+
+    Категория и местоположение приходят как slug и название и
+    разрешаются для всего пакета сразу, изображение не передаётся.
+    '''
+
+    class Meta(PostForm.Meta):
+        fields = ('title', 'text', 'pub_date')
@@ -0,0 +1,91 @@
+from blog import category_stats, timeline
+from blog.cache_tags import page_tags
+from blog.forms import PostImportForm
+from blog.models import Category, Location, Post
+from core import cache
+from core.bulk import bulk_insert
+from core.retry import retry_write
+
+MAX_BATCH = 1000
+
+
+def resolve(items):
+    '''Категории по slug и местоположения по названию: по запросу на пакет.
+
+    Из одноимённых местоположений берётся созданное первым.
+    '''
+    slugs = {item.get('category') for item in items} - {None}
+    names = {item.get('location') for item in items} - {None}
+    categories = {
+        category.slug: category
+        for category in Category.objects.filter(slug__in=slugs)
+    } if slugs else {}
+    locations = {}
+    if names:
+        for location in Location.objects.filter(
+            name__in=names
+        ).order_by('-pk'):
+            locations[location.name] = location
+    return categories, locations
+
+
+def validate(item, categories, locations):
+    '''Пост из элемента пакета или словарь ошибок.'''
+    if not isinstance(item, dict):
+        return None, {'__all__': ['Ожидается объект.']}
+    form = PostImportForm(data=item)
+    errors = {} if form.is_valid() else {
+        field: [error['message'] for error in field_errors]
+        for field, field_errors in form.errors.get_json_data().items()
+    }
+    category, location = item.get('category'), item.get('location')
+    if not category:
+        errors['category'] = ['Обязательное поле.']
+    elif category not in categories:
+        errors['category'] = [f'Категория {category!r} не найдена.']
+    if location and location not in locations:
+        errors['location'] = [f'Местоположение {location!r} не найдено.']
+    if errors:
+        return None, errors
+    return Post(
+        **form.cleaned_data,
+        category=categories[category],
+        location=locations.get(location),
+    ), None
+
+
+@retry_write(name='import_posts')
+def insert(posts):
+    '''Вставляет пакет одной транзакцией и проставляет постам pk.'''
+    bulk_insert(Post, posts)
+
+
+def import_posts(items, author):
+    '''Проверяет пакет по правилам PostForm и вставляет верные посты.
+
+    Все посты пакета вставляются одним bulk_create в одной транзакции.
+    Возвращает результаты по элементам в исходном порядке: {'id': pk}
+    или {'errors': {...}}.
+    '''
+    categories, locations = resolve(
+        [item for item in items if isinstance(item, dict)]
+    )
+    results, posts = [], []
+    for item in items:
+        post, errors = validate(item, categories, locations)
+        if post is None:
+            results.append({'errors': errors})
+        else:
+            post.author = author
+            posts.append(post)
+            results.append(post)
+    if posts:
+        insert(posts)
+        # bulk_create не отправляет сигналы моделей.
+        cache.invalidate(*page_tags(posts))
+        timeline.fan_out(posts)
+        category_stats.added(posts)
+    return [
+        {'id': result.pk} if isinstance(result, Post) else result
+        for result in results
+    ]
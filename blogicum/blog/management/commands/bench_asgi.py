@@ -0,0 +1,196 @@
+import asyncio
+import io
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from blog.management.commands.bench_urls import route_cases, sample_kwargs
+from core import bench, executor
+
+READ_ROUTES = ('index', 'category_posts', 'profile', 'post_detail')
+# Синхронные middleware переводят весь стек ASGI в один поток.
+SYNC_ONLY_MIDDLEWARE = (settings.DEBUG_TOOLBAR_MIDDLEWARE,)
+
+
+def wsgi_environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def asgi_scope(path):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность страниц чтения под WSGI (пул потоков) и '
+        'ASGI (асинхронные представления) при большом числе медленных '
+        'клиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--concurrency', type=int, default=200,
+                            help='Одновременных клиентов.')
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоков WSGI-сервера и пула ORM под ASGI.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=50,
+            help='Задержка чтения каждого фрагмента ответа клиентом, мс.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Сохранить отчёт в JSON.')
+
+    def handle(self, *args, **options):
+        kwargs, _ = sample_kwargs()
+        paths = [
+            url for name, url in route_cases(kwargs, ())
+            if name in READ_ROUTES
+        ]
+        middleware = [
+            name for name in settings.MIDDLEWARE
+            if name not in SYNC_ONLY_MIDDLEWARE
+        ]
+        report = {}
+        with override_settings(
+            DEBUG=False, MIDDLEWARE=middleware,
+            ASYNC_READ_WORKERS=options['workers'],
+        ):
+            executor.shutdown()
+            try:
+                for mode, run in (('wsgi', self.wsgi), ('asgi', self.asgi)):
+                    report[mode] = asyncio.run(run(paths, options))
+                    self.stdout.write(self.format_row(mode, report[mode]))
+            finally:
+                executor.shutdown()
+        if report['wsgi']['throughput']:
+            self.stdout.write('ASGI/WSGI: {:.2f}x'.format(
+                report['asgi']['throughput'] / report['wsgi']['throughput']
+            ))
+        if options['output']:
+            bench.dump(report, options['output'])
+
+    async def wsgi(self, paths, options):
+        '''Потоковый WSGI-сервер: медленный клиент держит поток.'''
+        application = WSGIHandler()
+        delay = options['client_delay'] / 1000
+        pool = ThreadPoolExecutor(options['workers'])
+
+        def serve(path):
+            status = []
+
+            def start_response(value, headers, exc_info=None):
+                status.append(int(value.split()[0]))
+
+            result = application(wsgi_environ(path), start_response)
+            try:
+                for _ in result:
+                    time.sleep(delay)
+            finally:
+                result.close()
+            return status[0]
+
+        async def request(path):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, serve, path)
+
+        try:
+            return await self.clients(request, paths, options)
+        finally:
+            pool.shutdown(wait=True)
+
+    async def asgi(self, paths, options):
+        '''ASGI: медленный клиент держит только корутину.'''
+        application = ASGIHandler()
+        delay = options['client_delay'] / 1000
+
+        async def request(path):
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'',
+                        'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body':
+                    await asyncio.sleep(delay)
+
+            await application(asgi_scope(path), receive, send)
+            return status[0]
+
+        return await self.clients(request, paths, options)
+
+    async def clients(self, request, paths, options):
+        '''Замкнутая модель: каждый клиент шлёт запросы без пауз.'''
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + options['duration']
+        latencies, statuses = [], Counter()
+
+        async def client(seed):
+            rng = random.Random(seed)
+            while loop.time() < deadline:
+                started = time.perf_counter()
+                statuses[await request(rng.choice(paths))] += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client(options['seed'] + seed)
+            for seed in range(options['concurrency'])
+        ))
+        elapsed = time.perf_counter() - started
+        return {
+            'requests': len(latencies),
+            'elapsed': elapsed,
+            'throughput': len(latencies) / elapsed,
+            **bench.summarize(latencies),
+            'statuses': dict(statuses),
+        }
+
+    def format_row(self, mode, row):
+        return (
+            f'{mode}: {row["requests"]} запросов, '
+            f'{row["throughput"]:.1f} запросов/с, '
+            f'p50={row["p50"]:.1f}ms p95={row["p95"]:.1f}ms '
+            f'p99={row["p99"]:.1f}ms статусы={row["statuses"]}'
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from blog.management.commands.bench_urls import (
+    measure, route_cases, sample_kwargs)
+from core import bench
+
+JINJA2_ROUTES = ('index', 'category_posts', 'profile', 'post_detail')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение времени ответа страниц ленты и поста при рендеринге '
+        'шаблонами Django и Jinja2.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+
+    def handle(self, *args, **options):
+        kwargs, author = sample_kwargs()
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(author)
+        results = {}
+        for name, url in route_cases(kwargs, ['last']):
+            if name.split('?')[0] not in JINJA2_ROUTES:
+                continue
+            row = {}
+            for engine, views in (('django', ()), ('jinja2', JINJA2_ROUTES)):
+                with override_settings(DEBUG=False, JINJA2_VIEWS=views):
+                    row[engine] = measure(
+                        client, url, options['repeat'], options['warmup']
+                    )
+            row['speedup'] = row['django']['p50'] / row['jinja2']['p50']
+            results[name] = row
+            self.stdout.write(
+                f'{name:<28} django p50={row["django"]["p50"]:7.2f}ms  '
+                f'jinja2 p50={row["jinja2"]["p50"]:7.2f}ms  '
+                f'x{row["speedup"]:.2f}'
+            )
+        if options['output']:
+            bench.dump(results, options['output'])
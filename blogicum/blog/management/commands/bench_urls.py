@@ -0,0 +1,146 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import sitemaps, urls
+from blog.models import Comment, Post
+from core import bench
+
+LIST_ROUTES = ('index', 'category_posts', 'profile')
+# Маршруты, принимающие только POST, и потоки SSE: GET для них не
+# измеряется.
+POST_ONLY_ROUTES = ('add_comment', 'api_import_posts', 'follow', 'unfollow')
+STREAM_ROUTES = ('comment_stream',)
+
+
+def sample_kwargs():
+    '''Значения параметров маршрутов из существующих данных.'''
+    visible = Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).select_related('author', 'category')
+    post = (
+        visible.filter(comments__isnull=False).order_by('-pk').first()
+        or visible.order_by('-pk').first()
+    )
+    if post is None:
+        raise CommandError(
+            'Нет опубликованных постов: сначала выполните generate_data.'
+        )
+    comment = (
+        post.comments.filter(author=post.author).first()
+        or post.comments.first()
+        or Comment(pk=0)
+    )
+    return {
+        'post_id': post.pk,
+        'comment_id': comment.pk,
+        'category_slug': post.category.slug,
+        'username': post.author.username,
+        'section': 'posts',
+        'shard': (post.pk - 1) // sitemaps.SHARD_SIZE,
+    }, post.author
+
+
+def route_cases(kwargs, deep_pages):
+    for pattern in urls.urlpatterns:
+        if pattern.name in (*POST_ONLY_ROUTES, *STREAM_ROUTES):
+            continue
+        params = pattern.pattern.converters
+        url = reverse(
+            f'{urls.app_name}:{pattern.name}',
+            kwargs={name: kwargs[name] for name in params},
+        )
+        yield pattern.name, url
+        if pattern.name in LIST_ROUTES:
+            for page in deep_pages:
+                yield f'{pattern.name}?page={page}', f'{url}?page={page}'
+
+
+def measure(client, url, repeat, warmup):
+    for _ in range(warmup):
+        client.get(url)
+    latencies, sql_times = [], []
+    for _ in range(repeat):
+        timer = bench.QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            latencies.append((time.perf_counter() - started) * 1000)
+        sql_times.append(timer.seconds * 1000)
+    return {
+        **bench.summarize(latencies),
+        'queries': timer.count,
+        'sql_ms': bench.percentile(sql_times, 50),
+        'bytes': size,
+        'status': response.status_code,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержки, числа и времени SQL-запросов и размера ответа '
+        'для каждого маршрута blog/urls.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--deep-pages', nargs='*', default=['last'],
+            help='Дополнительные страницы списков (номер или last).',
+        )
+        parser.add_argument('--routes', nargs='*', default=None,
+                            help='Только указанные имена маршрутов.')
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+        parser.add_argument('--baseline', help='JSON для сравнения.')
+        parser.add_argument('--threshold', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        kwargs, author = sample_kwargs()
+        anonymous = Client(HTTP_HOST='localhost')
+        authenticated = Client(HTTP_HOST='localhost')
+        authenticated.force_login(author)
+        results = {}
+        with override_settings(DEBUG=False):
+            for name, url in route_cases(kwargs, options['deep_pages']):
+                if options['routes'] and name.split('?')[0] not in (
+                    options['routes']
+                ):
+                    continue
+                for mode, client in (
+                    ('anon', anonymous), ('auth', authenticated)
+                ):
+                    key = f'{mode}:{name}'
+                    results[key] = measure(
+                        client, url, options['repeat'], options['warmup']
+                    )
+                    self.stdout.write(self.format_row(key, results[key]))
+        if options['output']:
+            bench.dump(results, options['output'])
+        if options['baseline']:
+            regressions = bench.compare(
+                results, bench.load(options['baseline']),
+                options['threshold'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write('Регрессий нет.')
+
+    def format_row(self, key, row):
+        return (
+            f'{key:<40} {row["status"]:>3} p50={row["p50"]:7.2f}ms '
+            f'p95={row["p95"]:7.2f}ms sql={row["queries"]:>3}/'
+            f'{row["sql_ms"]:6.2f}ms {row["bytes"]:>8}B'
+        )
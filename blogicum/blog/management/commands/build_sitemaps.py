@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает индекс и шарды карты сайта в SITEMAP_DIR; '
+        'запросы к sitemap.xml отдают готовые файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', required=True,
+            help='Адрес сайта без завершающего /, например '
+                 'https://blogicum.example.',
+        )
+        parser.add_argument('--output', '-o', default=None,
+                            help='Каталог; по умолчанию SITEMAP_DIR.')
+
+    def handle(self, *args, **options):
+        directory = options['output'] or settings.SITEMAP_DIR
+        if not directory:
+            raise CommandError('Укажите --output или SITEMAP_DIR.')
+        started = time.monotonic()
+        count = sitemaps.write(directory, options['base_url'].rstrip('/'))
+        self.stdout.write(
+            f'{count} файлов -> {directory} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
@@ -0,0 +1,193 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog import category_stats
+from blog.models import Category, Comment, Location, Post, User
+from core import cache
+from core.bulk import bulk_insert
+
+WORDS = (
+    'утро день вечер ночь город море лес горы дорога дом друг кот '
+    'книга кофе дождь снег солнце ветер поезд река мост парк окно '
+    'письмо музыка работа отпуск планы мысли встреча праздник'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Детерминированная генерация пользователей, категорий, '
+        'местоположений, публикаций и комментариев для нагрузочных тестов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--comments', type=int, default=300000,
+            help=(
+                'Примерное общее число комментариев: у каждого поста их '
+                'случайное число со средним comments / posts, у отложенных '
+                'постов комментариев нет.'
+            ),
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--days', type=int, default=3 * 365,
+            help='Глубина истории публикаций в днях.',
+        )
+        parser.add_argument('--unpublished', type=float, default=0.05)
+        parser.add_argument('--future', type=float, default=0.02)
+        parser.add_argument(
+            '--hidden-categories', type=float, default=0.1,
+            help='Доля категорий, снятых с публикации.',
+        )
+        parser.add_argument(
+            '--prefix', default='bench',
+            help='Префикс имён пользователей и slug категорий.',
+        )
+        parser.add_argument(
+            '--password', default='blogicum',
+            help='Пароль всех созданных пользователей.',
+        )
+        parser.add_argument(
+            '--now', default=None,
+            help='Опорное время ISO 8601; по умолчанию текущее.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.now = (
+            parse_datetime(options['now']) if options['now']
+            else timezone.now()
+        )
+        started = time.monotonic()
+        users = self.create_users()
+        categories = self.create_categories()
+        locations = self.create_locations()
+        posts, comments = self.create_posts(users, categories, locations)
+        # bulk_create не отправляет сигналы моделей.
+        category_stats.recount()
+        cache.invalidate(cache.ALL)
+        self.stdout.write(
+            f'Пользователей: {len(users)}, категорий: {len(categories)}, '
+            f'местоположений: {len(locations)}, публикаций: {posts}, '
+            f'комментариев: {comments} за '
+            f'{time.monotonic() - started:.1f} с'
+        )
+
+    def text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def skewed(self, items, power):
+        '''Элемент с перекосом к началу списка: «тяжёлые» авторы и посты.'''
+        return items[int(len(items) * self.rng.random() ** power)]
+
+    @transaction.atomic
+    def create_users(self):
+        prefix = self.options['prefix']
+        password = make_password(self.options['password'])
+        return bulk_insert(User, [
+            User(
+                username=f'{prefix}_user{i}',
+                email=f'{prefix}_user{i}@example.com',
+                password=password,
+                date_joined=self.now - timedelta(
+                    days=self.rng.uniform(0, self.options['days'])
+                ),
+            )
+            for i in range(self.options['users'])
+        ], self.batch_size)
+
+    @transaction.atomic
+    def create_categories(self):
+        prefix = self.options['prefix']
+        hidden = self.options['hidden_categories']
+        return bulk_insert(Category, [
+            Category(
+                title=f'Категория {i}',
+                description=self.text(20),
+                slug=f'{prefix}-category-{i}',
+                is_published=self.rng.random() >= hidden,
+                created_at=self.now,
+            )
+            for i in range(self.options['categories'])
+        ], self.batch_size)
+
+    @transaction.atomic
+    def create_locations(self):
+        return bulk_insert(Location, [
+            Location(
+                name=f'Место {i}',
+                is_published=self.rng.random() >= 0.1,
+                created_at=self.now,
+            )
+            for i in range(self.options['locations'])
+        ], self.batch_size)
+
+    def create_posts(self, users, categories, locations):
+        total = self.options['posts']
+        per_post = self.options['comments'] / max(total, 1)
+        n_posts = n_comments = 0
+        while n_posts < total:
+            size = min(self.batch_size, total - n_posts)
+            with transaction.atomic():
+                posts = [self.post(users, categories, locations)
+                         for _ in range(size)]
+                pks = bulk_insert(Post, posts, self.batch_size)
+                comments = [
+                    self.comment(pk, post.pub_date, users)
+                    for pk, post in zip(pks, posts)
+                    if post.pub_date <= self.now
+                    for _ in range(round(self.rng.expovariate(1 / per_post)))
+                ] if per_post else []
+                bulk_insert(Comment, comments, self.batch_size)
+            n_posts += size
+            n_comments += len(comments)
+            self.stdout.write(f'{n_posts}/{total}', ending='\r')
+        self.stdout.write('')
+        return n_posts, n_comments
+
+    def post(self, users, categories, locations):
+        days = self.options['days']
+        if self.rng.random() < self.options['future']:
+            pub_date = self.now + timedelta(days=self.rng.uniform(0, 30))
+        else:
+            pub_date = self.now - timedelta(
+                days=days * self.rng.random() ** 2
+            )
+        return Post(
+            title=self.text(self.rng.randint(2, 6)).capitalize(),
+            text=self.text(self.rng.randint(20, 200)),
+            pub_date=pub_date,
+            created_at=pub_date,
+            is_published=self.rng.random() >= self.options['unpublished'],
+            author_id=self.skewed(users, 3),
+            category_id=self.rng.choice(categories) if categories else None,
+            location_id=(
+                self.rng.choice(locations)
+                if locations and self.rng.random() < 0.7 else None
+            ),
+        )
+
+    def comment(self, post_pk, pub_date, users):
+        age = (self.now - pub_date).total_seconds()
+        return Comment(
+            post_id=post_pk,
+            author_id=self.skewed(users, 2),
+            text=self.text(self.rng.randint(3, 20)),
+            created_at=pub_date + timedelta(
+                seconds=age * self.rng.random() ** 3
+            ),
+        )
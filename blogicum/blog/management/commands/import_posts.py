@@ -0,0 +1,63 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.imports import MAX_BATCH, import_posts
+from blog.management.commands.stream_loaddata import (
+    iter_json_array, iter_jsonl
+)
+from blog.models import User
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Пакетный импорт постов из JSON-массива или JSONL: проверка по '
+        'правилам PostForm, bulk_create по транзакции на пакет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--author', required=True,
+                            help='Имя пользователя — автора постов.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]!r}.')
+        size = min(options['batch_size'], MAX_BATCH)
+        started = time.monotonic()
+        created = failed = 0
+        with open(options['path'], encoding=options['encoding']) as stream:
+            items = (
+                iter_jsonl(stream) if options['path'].endswith('.jsonl')
+                else iter_json_array(stream)
+            )
+            for number, batch in enumerate(batches(items, size)):
+                for index, result in enumerate(import_posts(batch, author)):
+                    if 'id' in result:
+                        created += 1
+                        continue
+                    failed += 1
+                    self.stderr.write(
+                        f'#{number * size + index}: '
+                        + json.dumps(result['errors'], ensure_ascii=False)
+                    )
+        self.stdout.write(
+            f'Создано постов: {created}, с ошибками: {failed} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
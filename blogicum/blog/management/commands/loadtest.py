@@ -0,0 +1,314 @@
+import io
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from blog.models import Category, Post, User
+from core import bench, metrics
+from core.retry import is_retryable
+
+DEFAULT_MIX = 'index=50,category=15,detail=20,profile=5,comment=8,post=2'
+WRITES = ('comment', 'post')
+SAMPLE_SIZE = 200
+CSRF_ALLOWED_CHARS = (
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+)
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        kind, _, weight = item.partition('=')
+        if kind not in ('index', 'category', 'detail', 'profile', *WRITES):
+            raise CommandError(f'Неизвестный тип запроса: {kind}')
+        mix[kind] = float(weight)
+    return mix
+
+
+class Stats:
+    '''Потокобезопасный сбор результатов по типам запросов.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.db_seconds = defaultdict(float)
+        self.lock_errors = Counter()
+
+    def add(self, kind, latency, status, db_seconds, locked):
+        with self.lock:
+            self.latencies[kind].append(latency)
+            self.statuses[kind][status] += 1
+            self.db_seconds[kind] += db_seconds
+            if locked:
+                self.lock_errors[kind] += 1
+
+    def report(self, elapsed):
+        everything = [
+            value for values in self.latencies.values() for value in values
+        ]
+        kinds = {}
+        for kind, latencies in sorted(self.latencies.items()):
+            count = len(latencies)
+            errors = sum(
+                n for status, n in self.statuses[kind].items()
+                if status >= 500
+            )
+            kinds[kind] = {
+                'requests': count,
+                **bench.summarize(latencies),
+                'error_rate': errors / count,
+                'lock_rate': self.lock_errors[kind] / count,
+                'db_ms_mean': self.db_seconds[kind] * 1000 / count,
+                'statuses': dict(self.statuses[kind]),
+            }
+        return {
+            'elapsed': elapsed,
+            'requests': len(everything),
+            'throughput': len(everything) / elapsed,
+            'latency': bench.summarize(everything),
+            'histogram': bench.histogram(everything),
+            'kinds': kinds,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Конкурентная нагрузка на WSGI-приложение blogicum.wsgi: смесь '
+        'чтения ленты и записи комментариев и постов в пуле потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Запросов в секунду (открытая модель, пуассоновский поток); '
+                 '0 — каждый поток шлёт запросы без пауз.',
+        )
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Веса типов запросов: index=50,post=2,...')
+        parser.add_argument('--users', type=int, default=20,
+                            help='Число авторов, от имени которых пишем.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Сохранить отчёт в JSON.')
+
+    def handle(self, *args, **options):
+        from blogicum.wsgi import application
+
+        self.application = application
+        self.rng = random.Random(options['seed'])
+        self.rng_lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = Stats()
+        self.prepare(options['users'])
+        kinds, weights = zip(*parse_mix(options['mix']).items())
+        retries_before = metrics.snapshot()
+        got_request_exception.connect(self.on_exception)
+        try:
+            with override_settings(DEBUG=False):
+                started = time.perf_counter()
+                if options['rate']:
+                    self.open_loop(kinds, weights, options)
+                else:
+                    self.closed_loop(kinds, weights, options)
+                elapsed = time.perf_counter() - started
+        finally:
+            got_request_exception.disconnect(self.on_exception)
+        report = self.stats.report(elapsed)
+        report['write_retry'] = {
+            name: value - retries_before.get(name, 0)
+            for name, value in metrics.snapshot().items()
+            if name.startswith('write_retry.')
+        }
+        self.print_report(report)
+        if options['output']:
+            bench.dump(report, options['output'])
+
+    def prepare(self, n_users):
+        '''Выборка данных и сессии авторов для запросов записи.'''
+        posts = Post.objects.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now(),
+        ).order_by('-pub_date')
+        self.post_ids = list(posts.values_list('pk', flat=True)[:SAMPLE_SIZE])
+        self.usernames = list(
+            posts.values_list('author__username', flat=True)
+            .distinct()[:SAMPLE_SIZE]
+        )
+        self.categories = list(
+            Category.objects.filter(is_published=True)
+            .values_list('pk', 'slug')[:SAMPLE_SIZE]
+        )
+        if not self.post_ids:
+            raise CommandError(
+                'Нет опубликованных постов: сначала выполните generate_data.'
+            )
+        self.sessions = []
+        for user in User.objects.filter(
+            username__in=self.usernames
+        )[:n_users]:
+            client = Client()
+            client.force_login(user)
+            self.sessions.append(
+                client.cookies[settings.SESSION_COOKIE_NAME].value
+            )
+
+    def choice(self, items):
+        with self.rng_lock:
+            return self.rng.choice(items)
+
+    def build(self, kind):
+        '''Метод, путь, данные формы и сессия для запроса типа kind.'''
+        if kind == 'index':
+            return 'GET', reverse('blog:index'), None, None
+        if kind == 'category':
+            path = reverse(
+                'blog:category_posts', args=[self.choice(self.categories)[1]]
+            )
+            return 'GET', path, None, None
+        if kind == 'detail':
+            post_id = self.choice(self.post_ids)
+            path = reverse('blog:post_detail', args=[post_id])
+            return 'GET', path, None, None
+        if kind == 'profile':
+            path = reverse('blog:profile', args=[self.choice(self.usernames)])
+            return 'GET', path, None, None
+        session = self.choice(self.sessions)
+        if kind == 'comment':
+            post_id = self.choice(self.post_ids)
+            path = reverse('blog:add_comment', args=[post_id])
+            return 'POST', path, {'text': 'Нагрузочный комментарий'}, session
+        return 'POST', reverse('blog:create_post'), {
+            'title': 'Нагрузочный пост',
+            'text': 'Текст нагрузочного поста',
+            'pub_date': timezone.localtime().strftime('%Y-%m-%d %H:%M'),
+            'category': self.choice(self.categories)[0],
+        }, session
+
+    def environ(self, method, path, data, session):
+        body = urlencode(data or {}).encode()
+        csrf = get_random_string(64, CSRF_ALLOWED_CHARS)
+        cookies = f'{settings.CSRF_COOKIE_NAME}={csrf}'
+        if session:
+            cookies += f'; {settings.SESSION_COOKIE_NAME}={session}'
+        return {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_COOKIE': cookies,
+            'HTTP_X_CSRFTOKEN': csrf,
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+
+    def on_exception(self, sender, request=None, **kwargs):
+        self.local.exception = sys.exc_info()[1]
+
+    def request(self, kind, scheduled=None):
+        '''Один запрос; задержка считается от запланированного момента.'''
+        status_holder = []
+
+        def start_response(status, headers, exc_info=None):
+            status_holder.append(int(status.split()[0]))
+
+        self.local.exception = None
+        timer = bench.QueryTimer()
+        started = scheduled or time.perf_counter()
+        with connection.execute_wrapper(timer):
+            result = self.application(self.environ(*self.build(kind)),
+                                      start_response)
+            try:
+                for _ in result:
+                    pass
+            finally:
+                result.close()
+        exception = self.local.exception
+        self.stats.add(
+            kind, (time.perf_counter() - started) * 1000,
+            status_holder[0], timer.seconds,
+            exception is not None and is_retryable(exception),
+        )
+
+    def closed_loop(self, kinds, weights, options):
+        deadline = time.perf_counter() + options['duration']
+
+        def worker(seed):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                self.request(rng.choices(kinds, weights)[0])
+
+        with ThreadPoolExecutor(options['threads']) as executor:
+            futures = [
+                executor.submit(worker, options['seed'] + seed)
+                for seed in range(options['threads'])
+            ]
+        for future in futures:
+            future.result()
+
+    def open_loop(self, kinds, weights, options):
+        rng = random.Random(options['seed'])
+        deadline = time.perf_counter() + options['duration']
+        scheduled = time.perf_counter()
+        futures = []
+        with ThreadPoolExecutor(options['threads']) as executor:
+            while True:
+                scheduled += rng.expovariate(options['rate'])
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(
+                    self.request, rng.choices(kinds, weights)[0], scheduled,
+                ))
+        for future in futures:
+            future.result()
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{report["requests"]} запросов за {report["elapsed"]:.1f} с, '
+            f'{report["throughput"]:.1f} запросов/с, '
+            f'p50={report["latency"]["p50"]:.1f}ms '
+            f'p95={report["latency"]["p95"]:.1f}ms '
+            f'p99={report["latency"]["p99"]:.1f}ms'
+        )
+        for kind, row in report['kinds'].items():
+            self.stdout.write(
+                f'  {kind:<10} n={row["requests"]:<6} '
+                f'p50={row["p50"]:7.1f}ms p95={row["p95"]:7.1f}ms '
+                f'ошибки={row["error_rate"]:.2%} '
+                f'блокировки={row["lock_rate"]:.2%} '
+                f'БД={row["db_ms_mean"]:.1f}ms'
+            )
+        self.stdout.write('Гистограмма задержек (мс):')
+        for bucket, count in report['histogram'].items():
+            self.stdout.write(f'  {bucket:>7}: {count}')
+        for name, value in report['write_retry'].items():
+            self.stdout.write(f'  {name}: {value:g}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает оценки популярного по комментариям последних '
+        'поколений (после массовой загрузки данных).'
+    )
+
+    def handle(self, *args, **options):
+        count = trending.rebuild()
+        self.stdout.write(f'Постов с оценкой: {count}')
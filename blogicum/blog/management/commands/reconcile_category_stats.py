@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog import category_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов категорий и исправляет '
+        'расхождения (после загрузки данных в обход сигналов).'
+    )
+
+    def handle(self, *args, **options):
+        count = category_stats.recount()
+        self.stdout.write(f'Исправлено категорий: {count}')
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import sqlite
+
+
+class Command(BaseCommand):
+    help = 'Обслуживание SQLite: checkpoint WAL, ANALYZE, incremental vacuum.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--checkpoint', choices=[
+                mode.lower() for mode in sqlite.CHECKPOINT_MODES
+            ],
+            help='Выполнить wal_checkpoint в указанном режиме.',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Обновить статистику планировщика.',
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help=(
+                'Включить auto_vacuum = INCREMENTAL (полный VACUUM с '
+                'эксклюзивной блокировкой базы).'
+            ),
+        )
+        parser.add_argument(
+            '--vacuum-pages', type=int, default=None,
+            help=(
+                'Освободить указанное число страниц (0 — все); нужен '
+                'режим auto_vacuum = INCREMENTAL.'
+            ),
+        )
+        parser.add_argument(
+            '--health', action='store_true',
+            help='Вывести размер WAL и статистику страниц.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        if options['checkpoint']:
+            busy, log, done = sqlite.checkpoint(
+                connection, options['checkpoint']
+            )
+            self.stdout.write(
+                f'checkpoint: busy={busy} log={log} checkpointed={done}'
+            )
+        if options['analyze']:
+            sqlite.analyze(connection)
+            self.stdout.write('analyze: ok')
+        if options['enable_incremental_vacuum']:
+            sqlite.enable_incremental_vacuum(connection)
+            self.stdout.write('auto_vacuum: incremental')
+        if options['vacuum_pages'] is not None:
+            try:
+                sqlite.incremental_vacuum(
+                    connection, options['vacuum_pages']
+                )
+            except ValueError as error:
+                raise CommandError(str(error))
+            self.stdout.write('incremental_vacuum: ok')
+        if options['health']:
+            self.stdout.write(
+                json.dumps(sqlite.health(connection), indent=2)
+            )
@@ -0,0 +1,67 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import CHUNK_SIZE, MODELS, export_lines, resume_jsonl
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковый экспорт публикаций, комментариев, категорий и '
+        'местоположений в JSONL или CSV с постоянным расходом памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MODELS))
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            default='jsonl')
+        parser.add_argument('--output', '-o', default=None,
+                            help='Файл; по умолчанию stdout.')
+        parser.add_argument('--after-pk', type=int, default=None)
+        parser.add_argument('--until-pk', type=int, default=None)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help=(
+                'Продолжить JSONL-экспорт в --output с последней строки; '
+                'несовместимо с --after-pk.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        model = MODELS[options['model']]
+        fmt, path = options['format'], options['output']
+        after_pk, mode = options['after_pk'], 'w'
+        if options['resume']:
+            if fmt != 'jsonl' or not path:
+                raise CommandError('--resume работает только для JSONL-файла.')
+            if after_pk is not None:
+                raise CommandError(
+                    '--resume берёт pk из файла; не задавайте --after-pk.'
+                )
+            if os.path.exists(path):
+                after_pk, mode = resume_jsonl(path), 'a'
+            if after_pk is None:
+                self.stderr.write(
+                    f'{path}: нет строк для продолжения, экспорт с начала.'
+                )
+        lines = export_lines(
+            model._default_manager.all(), fmt,
+            header=mode == 'w',
+            after_pk=after_pk, until_pk=options['until_pk'],
+            chunk_size=options['chunk_size'],
+        )
+        out = open(path, mode, encoding='utf-8', newline='') if path else (
+            sys.stdout
+        )
+        count = -1 if fmt == 'csv' and mode == 'w' else 0
+        try:
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if path:
+                out.close()
+        if path:
+            self.stderr.write(f'{model._meta.label}: {count} строк -> {path}')
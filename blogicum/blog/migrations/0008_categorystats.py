@@ -0,0 +1,53 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:11
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    CategoryStats = apps.get_model('blog', 'CategoryStats')
+    Post = apps.get_model('blog', 'Post')
+    now = timezone.now()
+    rows = {
+        row['category']: row
+        for row in Post.objects.filter(
+            is_published=True, category__isnull=False,
+        ).values('category').annotate(
+            post_count=Count('pk', filter=Q(pub_date__lte=now)),
+            next_pub_date=Min('pub_date', filter=Q(pub_date__gt=now)),
+        )
+    }
+    CategoryStats.objects.bulk_create([
+        CategoryStats(
+            category_id=pk,
+            post_count=rows.get(pk, {}).get('post_count', 0),
+            next_pub_date=rows.get(pk, {}).get('next_pub_date'),
+        )
+        for pk in Category.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.category', verbose_name='Категория')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('next_pub_date', models.DateTimeField(blank=True, null=True, verbose_name='Ближайшая отложенная публикация')),
+            ],
+            options={
+                'verbose_name': 'статистика категории',
+                'verbose_name_plural': 'Статистика категорий',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
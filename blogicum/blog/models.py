@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from core.models import Actions
 
@@ -43,6 +44,19 @@ class Location(Actions):
         return self.name[:TEXT]
 
 
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        '''Посты, которые видны всем: опубликованные, в опубликованной
+        категории и с наступившей датой публикации.
+        '''
+        return self.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now(),
+        )
+
+
 class Post(Actions):
     '''Публикация.'''
 
@@ -78,6 +92,15 @@ class Post(Actions):
         related_name='posts',
         verbose_name='Категория',
     )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    # Пишется пачками из blog.counters.post_views, не через save().
+    # Правка поста читает его с defer('views'): save() тогда обновляет
+    # только загруженные поля и не затирает сброшенные просмотры.
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
@@ -86,6 +109,14 @@ class Post(Actions):
     def __str__(self):
         return self.title[:TEXT]
 
+    def is_visible_to(self, user):
+        '''Автор видит свой пост всегда, остальные — только опубликованный.'''
+        return self.author == user or (
+            self.is_published
+            and not (self.category and not self.category.is_published)
+            and self.pub_date <= timezone.now()
+        )
+
 
 class Comment(models.Model):
     '''Коммент'''
@@ -102,12 +133,140 @@ class Comment(models.Model):
     )
     created_at = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Добавлено')
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+        )
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return f'Комментарий {self.author} к посту "{self.post}".'
+
+
+class TrendingPost(models.Model):
+    '''Оценка популярности поста (blog.trending).
+
+    score — сумма весов комментариев и просмотров, каждый умножен на
+    2 ** (возраст от начала поколения generation / период полураспада).
+    Внутри поколения порядок по score равен порядку по затухающей
+    оценке, поэтому топ читается по индексу (generation, -score).
+    '''
+
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True,
+        related_name='trending', verbose_name='Публикация',
+    )
+    generation = models.IntegerField('Поколение')
+    score = models.FloatField('Оценка', default=0)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('generation', '-score'),
+                name='trending_generation_score_idx',
+            ),
+        )
+        verbose_name = 'популярная публикация'
+        verbose_name_plural = 'Популярные публикации'
+
+    def __str__(self):
+        return f'{self.post}: {self.score:.2f}'
+
+
+class Follow(models.Model):
+    '''Подписка пользователя на автора.'''
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='following',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='followers',
+        verbose_name='Автор',
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='follow_unique',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self',
+            ),
+        )
+        verbose_name = 'подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    '''Пост в ленте подписок пользователя (blog.timeline).
+
+    pub_date копируется из поста: страница ленты читается по индексу
+    (user, -pub_date, -post) без сортировки постов.
+    '''
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='timeline',
+        verbose_name='Пользователь',
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='timeline_entries',
+        verbose_name='Публикация',
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='timeline_unique',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+        )
+        verbose_name = 'запись ленты подписок'
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
+
+
+class CategoryStats(models.Model):
+    '''Счётчик постов категории (blog.category_stats).
+
+    post_count — опубликованные посты с наступившей датой публикации;
+    next_pub_date — ближайшая дата отложенного поста: после неё
+    счётчик категории пересчитывается.
+    '''
+
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='Категория',
+    )
+    post_count = models.PositiveIntegerField('Публикаций', default=0)
+    next_pub_date = models.DateTimeField(
+        'Ближайшая отложенная публикация', null=True, blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+    def __str__(self):
+        return f'{self.category}: {self.post_count}'
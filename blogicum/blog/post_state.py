@@ -0,0 +1,38 @@
+from django.db.models.signals import pre_save
+
+from blog.models import Post
+
+# Поля поста, от которых зависят его ленты и счётчики категорий.
+TRACKED = ('category', 'is_published', 'pub_date')
+UNCHANGED = object()
+
+
+def state(post):
+    '''(category_id, is_published, pub_date) поста.'''
+    return post.category_id, post.is_published, post.pub_date
+
+
+def remember(sender, instance, raw=False, using=None, update_fields=None,
+             **kwargs):
+    '''pre_save: состояние поста в БД до сохранения для previous().'''
+    if raw or (
+        update_fields is not None and not set(update_fields) & set(TRACKED)
+    ):
+        instance._tracked_state = UNCHANGED
+    elif instance._state.adding:
+        instance._tracked_state = None
+    else:
+        instance._tracked_state = Post.objects.using(using).filter(
+            pk=instance.pk
+        ).values_list(*TRACKED).first()
+
+
+def previous(instance):
+    '''В post_save: state() поста до сохранения, None — поста не было,
+    UNCHANGED — сохранение не затронуло TRACKED.
+    '''
+    return getattr(instance, '_tracked_state', UNCHANGED)
+
+
+def connect():
+    pre_save.connect(remember, sender=Post)
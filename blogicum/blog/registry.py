@@ -0,0 +1,45 @@
+from django.db.models.query import ModelIterable
+from django.db.models.signals import post_delete, post_save
+
+from blog.models import Category, Location, Post
+from core.registry import Registry
+
+categories = Registry('category', Category, fields=('pk', 'slug'))
+locations = Registry('location', Location)
+
+
+def attach(post):
+    '''Категория и местоположение поста из справочников, без JOIN.'''
+    for field, registry in (
+        (Post.category.field, categories), (Post.location.field, locations)
+    ):
+        pk = getattr(post, field.attname)
+        if pk is not None and not field.is_cached(post):
+            field.set_cached_value(post, registry.get(pk=pk))
+    return post
+
+
+class CachedRelationsIterable(ModelIterable):
+    def __iter__(self):
+        for post in super().__iter__():
+            yield attach(post)
+
+
+def with_cached_relations(queryset):
+    '''Посты queryset получают category и location через attach().'''
+    queryset = queryset._chain()
+    queryset._iterable_class = CachedRelationsIterable
+    return queryset
+
+
+def _invalidate(registry):
+    def receiver(sender, **kwargs):
+        registry.invalidate()
+    return receiver
+
+
+def connect():
+    for registry in (categories, locations):
+        receiver = _invalidate(registry)
+        for signal in (post_save, post_delete):
+            signal.connect(receiver, sender=registry.model, weak=False)
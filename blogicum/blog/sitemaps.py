@@ -0,0 +1,245 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Max, Q
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+
+from blog.cache_tags import FEED
+from blog.models import Category, Post, User
+from core import cache
+
+# Предел протокола sitemaps.org на один файл.
+SHARD_SIZE = 50000
+CHUNK_SIZE = 2000
+CACHE_TIMEOUT = 60
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class Section:
+    '''Раздел карты сайта: строки queryset по возрастанию pk.
+
+    Шард n содержит строки с pk из (n * SHARD_SIZE, (n + 1) * SHARD_SIZE]:
+    в нём не больше SHARD_SIZE адресов, а номер шарда у строки не
+    меняется при добавлении и удалении других строк.
+    '''
+
+    name = None
+    lastmod = None
+    columns = ('pk',)
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def location(self, row):
+        raise NotImplementedError
+
+    def shards(self):
+        '''[(номер шарда, lastmod)] непустых шардов одним GROUP BY.'''
+        queryset = self.get_queryset().annotate(
+            shard=(F('pk') - 1) / SHARD_SIZE
+        ).values('shard').order_by('shard')
+        if self.lastmod is None:
+            return [(shard, None) for shard in queryset.distinct()
+                    .values_list('shard', flat=True)]
+        return list(
+            queryset.annotate(lastmod=self.last_modified())
+            .values_list('shard', 'lastmod')
+        )
+
+    def last_modified(self):
+        return Max(self.lastmod)
+
+    def exists(self, shard, using=None):
+        '''Есть ли в шарде строки: пустой шард в индекс не попадает.'''
+        return self.get_queryset().using(using).filter(
+            pk__gt=shard * SHARD_SIZE, pk__lte=(shard + 1) * SHARD_SIZE
+        ).exists()
+
+    def rows(self, shard, using=None):
+        '''Строки шарда пачками по keyset pk, без OFFSET.'''
+        queryset = self.get_queryset().using(using).values(*self.columns)
+        last, until = shard * SHARD_SIZE, (shard + 1) * SHARD_SIZE
+        while True:
+            chunk = list(queryset.filter(
+                pk__gt=last, pk__lte=until
+            ).order_by('pk')[:CHUNK_SIZE])
+            if not chunk:
+                return
+            yield from chunk
+            last = chunk[-1]['pk']
+
+
+class PostSection(Section):
+    name = 'posts'
+    lastmod = 'updated_at'
+    columns = ('pk', 'updated_at')
+
+    def get_queryset(self):
+        return Post.objects.published()
+
+    def location(self, row):
+        return reverse('blog:post_detail', args=[row['pk']])
+
+
+class CategorySection(Section):
+    name = 'categories'
+    lastmod = 'posts__updated_at'
+    columns = ('pk', 'slug')
+
+    def get_queryset(self):
+        return Category.objects.filter(is_published=True)
+
+    def last_modified(self):
+        '''Последняя правка среди постов, видимых в категории.'''
+        return Max(self.lastmod, filter=Q(
+            posts__is_published=True, posts__pub_date__lte=timezone.now()
+        ))
+
+    def location(self, row):
+        return reverse('blog:category_posts', args=[row['slug']])
+
+
+class ProfileSection(Section):
+    name = 'profiles'
+    columns = ('pk', 'username')
+
+    def get_queryset(self):
+        # Только авторы с опубликованными постами.
+        return User.objects.filter(
+            pk__in=Post.objects.published().values('author_id')
+        )
+
+    def location(self, row):
+        return reverse('blog:profile', args=[row['username']])
+
+
+SECTIONS = {
+    section.name: section
+    for section in (PostSection(), CategorySection(), ProfileSection())
+}
+
+
+def w3c(value):
+    return value.replace(microsecond=0).isoformat()
+
+
+def index_entries():
+    '''[(раздел, шард, lastmod)] всех непустых шардов.'''
+    return cache.get_or_set('sitemap:index', lambda: [
+        (name, shard, lastmod)
+        for name, section in SECTIONS.items()
+        for shard, lastmod in section.shards()
+    ], tags=[FEED], timeout=CACHE_TIMEOUT)
+
+
+def index_lines(base_url, entries):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<sitemapindex xmlns="{XMLNS}">\n'
+    for name, shard, lastmod in entries:
+        loc = escape(base_url + reverse(
+            'blog:sitemap_section', args=[name, shard]
+        ))
+        yield f'<sitemap><loc>{loc}</loc>'
+        if lastmod:
+            yield f'<lastmod>{w3c(lastmod)}</lastmod>'
+        yield '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def section_lines(base_url, section, shard, using=None):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    for row in section.rows(shard, using=using):
+        yield f'<url><loc>{escape(base_url + section.location(row))}</loc>'
+        if section.lastmod in row and row[section.lastmod]:
+            yield f'<lastmod>{w3c(row[section.lastmod])}</lastmod>'
+        yield '</url>\n'
+    yield '</urlset>\n'
+
+
+def filename(name=None, shard=None):
+    if name is None:
+        return 'sitemap.xml'
+    return f'sitemap-{name}-{shard}.xml'
+
+
+def write(directory, base_url):
+    '''Записывает индекс и все шарды в directory; возвращает число файлов.
+
+    Каждый файл пишется во временный и заменяется os.replace(), так что
+    читатели не видят недописанных файлов. Индекс пишется последним.
+    '''
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = [
+        (name, shard, lastmod)
+        for name, section in SECTIONS.items()
+        for shard, lastmod in section.shards()
+    ]
+    files = [
+        (filename(name, shard),
+         section_lines(base_url, SECTIONS[name], shard))
+        for name, shard, _ in entries
+    ]
+    files.append((filename(), index_lines(base_url, entries)))
+    written = {name for name, _ in files}
+    for name, lines in files:
+        tmp = directory / f'.{name}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            fh.writelines(lines)
+        os.replace(tmp, directory / name)
+    for path in directory.glob('sitemap-*.xml'):
+        if path.name not in written:
+            path.unlink()
+    return len(files)
+
+
+def from_disk(name):
+    directory = settings.SITEMAP_DIR
+    if directory and (Path(directory) / name).is_file():
+        return FileResponse(
+            open(Path(directory) / name, 'rb'), content_type=CONTENT_TYPE
+        )
+    return None
+
+
+def base_url(request):
+    return request.build_absolute_uri('/')[:-1]
+
+
+def sitemap_index(request):
+    '''Индекс шардов: файл из SITEMAP_DIR или на лету.'''
+    response = from_disk(filename())
+    if response is None:
+        response = StreamingHttpResponse(
+            index_lines(base_url(request), index_entries()),
+            content_type=CONTENT_TYPE,
+        )
+    return response
+
+
+def sitemap_section(request, section, shard):
+    '''Шард раздела: файл из SITEMAP_DIR или поток строк на лету.
+
+    Пустой шард или шард за концом раздела — 404, как и неизвестный
+    раздел.
+    '''
+    if section not in SECTIONS:
+        raise Http404
+    response = from_disk(filename(section, shard))
+    if response is None:
+        section = SECTIONS[section]
+        # Базу выбираем сейчас: генератор работает уже после dispatch.
+        using = section.get_queryset().db
+        if not section.exists(shard, using=using):
+            raise Http404
+        response = StreamingHttpResponse(
+            section_lines(base_url(request), section, shard, using=using),
+            content_type=CONTENT_TYPE,
+        )
+    return response
@@ -0,0 +1,256 @@
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import Resolver404, resolve
+
+from blog.models import Comment, Post
+from core import executor
+from core.pubsub import AsyncSubscription, broker
+
+DEFAULTS = {
+    'HEARTBEAT': 15,
+    'IDLE_TIMEOUT': 300,
+    'QUEUE_SIZE': 32,
+    'MAX_CONNECTIONS': 100,
+    'BACKLOG': 100,
+    'RETRY_MS': 3000,
+}
+HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'COMMENT_STREAM', {})}
+
+
+def channel(post_id):
+    return f'comments:{post_id}'
+
+
+def render_comment(comment, request=None):
+    '''Фрагмент комментария, как в списке на странице поста.
+
+    Без request фрагмент общий для всех подписчиков и не содержит
+    ссылок правки: автор получает их через comment_fragment.
+    '''
+    return render_to_string(
+        'includes/comment.html', {'comment': comment, 'post': comment.post},
+        request=request,
+    )
+
+
+def publish_comment(sender, instance, created, **kwargs):
+    '''post_save Comment: после коммита рассылает фрагмент подписчикам.'''
+    if not created:
+        return
+
+    def publish():
+        name = channel(instance.post_id)
+        if broker.has_subscribers(name):
+            broker.publish(name, (instance.pk, render_comment(instance)))
+
+    transaction.on_commit(publish)
+
+
+def last_event_id(*values):
+    ids = [int(value) for value in values if value and value.isdigit()]
+    return max(ids, default=0)
+
+
+def load_backlog(post_id, after):
+    '''Комментарии новее after или None, если пост не опубликован.'''
+    visible = Post.objects.published().filter(pk=post_id).exists()
+    if not visible:
+        return None
+    if not after:
+        return []
+    comments = Comment.objects.select_related('author', 'post').filter(
+        post_id=post_id, pk__gt=after,
+    ).order_by('pk')[:config()['BACKLOG']]
+    return [(comment.pk, render_comment(comment)) for comment in comments]
+
+
+class CommentStream:
+    '''Состояние одного SSE-потока: события, heartbeat и idle-таймаут.'''
+
+    def __init__(self, subscription, after, backlog, options):
+        self.subscription = subscription
+        self.last_id = after
+        self.backlog = backlog
+        self.options = options
+        self.touch()
+
+    def touch(self):
+        self.idle_deadline = time.monotonic() + self.options['IDLE_TIMEOUT']
+
+    def start(self):
+        chunks = [f'retry: {self.options["RETRY_MS"]}\n\n']
+        for message in self.backlog:
+            chunks.append(self.event(message))
+        return ''.join(chunks)
+
+    def event(self, message):
+        comment_id, html = message
+        self.last_id = max(self.last_id, comment_id)
+        data = ''.join(f'data: {line}\n' for line in html.splitlines())
+        return f'id: {comment_id}\nevent: comment\n{data}\n'
+
+    def timeout(self):
+        '''Сколько ждать следующего сообщения; 0 — поток пора закрыть.'''
+        remaining = self.idle_deadline - time.monotonic()
+        if remaining <= 0:
+            return 0
+        return min(self.options['HEARTBEAT'], remaining)
+
+    def step(self, message):
+        '''Фрагмент ответа для полученного сообщения; None — конец.'''
+        if self.subscription.closed or self.subscription.overflowed:
+            # Переполнение: клиент переподключится с Last-Event-ID.
+            return None
+        if message is None:
+            if time.monotonic() >= self.idle_deadline:
+                return None
+            return ': ping\n\n'
+        if message[0] <= self.last_id:
+            return ''
+        self.touch()
+        return self.event(message)
+
+    def close_event(self):
+        if self.subscription.overflowed:
+            return ''
+        # Клиент не переподключается после простоя (см. comments.html).
+        return 'event: close\ndata: \n\n'
+
+    async def __aiter__(self):
+        yield self.start()
+        while True:
+            timeout = self.timeout()
+            message = await self.subscription.get(timeout) if timeout else None
+            chunk = self.step(message)
+            if chunk is None:
+                if not self.subscription.closed:
+                    yield self.close_event()
+                return
+            if chunk:
+                yield chunk
+
+
+def comment_stream(request, post_id):
+    '''Маршрут SSE для reverse(); потоки обслуживает asgi_comment_stream.
+
+    Синхронный обработчик держал бы поток сервера всё время
+    соединения, а EventSource переподключается сам. Ответ 204
+    останавливает переподключения.
+    '''
+    return HttpResponse(status=204)
+
+
+def comment_fragment(request, post_id, comment_id):
+    '''Комментарий в контексте запроса: автору — со ссылками правки.'''
+    comment = get_object_or_404(
+        Comment.objects.select_related('author', 'post'),
+        pk=comment_id, post_id=post_id,
+    )
+    if not comment.post.is_visible_to(request.user):
+        raise Http404
+    return HttpResponse(render_comment(comment, request))
+
+
+async def asgi_comment_stream(scope, receive, send, post_id):
+    '''SSE новых комментариев без Django-обработчика.
+
+    Django 3.2 перебирает потоковые ответы в цикле событий синхронно,
+    поэтому под ASGI поток обслуживается здесь: соединение держит
+    только корутину, к БД обращается пул core.executor.
+    '''
+    options = config()
+    subscription = broker.subscribe(
+        channel(post_id), options['QUEUE_SIZE'], options['MAX_CONNECTIONS'],
+        subscription_class=AsyncSubscription,
+    )
+    if subscription is None:
+        await _send_empty(send, 503, [
+            (b'retry-after', str(options['RETRY_MS'] // 1000).encode()),
+        ])
+        return
+    watcher = asyncio.ensure_future(_close_on_disconnect(receive,
+                                                         subscription))
+    try:
+        headers = dict(
+            (name.decode('latin-1').lower(), value.decode('latin-1'))
+            for name, value in scope.get('headers', ())
+        )
+        query = parse_qs(scope.get('query_string', b'').decode())
+        after = last_event_id(headers.get('last-event-id'),
+                              *query.get('after', ()))
+        backlog = await executor.run(load_backlog, post_id, after)
+        if backlog is None:
+            await _send_empty(send, 404)
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                *((name.lower().encode(), value.encode())
+                  for name, value in HEADERS.items()),
+            ],
+        })
+        async for chunk in CommentStream(
+            subscription, after, backlog, options
+        ):
+            await _send_body(send, chunk)
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        if not subscription.closed:
+            subscription.close()
+
+
+async def _close_on_disconnect(receive, subscription):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.close()
+
+
+async def _send_body(send, text):
+    await send({
+        'type': 'http.response.body',
+        'body': text.encode(),
+        'more_body': True,
+    })
+
+
+async def _send_empty(send, status, headers=()):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': list(headers)})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def with_comment_streams(application):
+    '''ASGI-приложение: потоки комментариев — asgi_comment_stream,
+    остальные запросы — Django.
+    '''
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'].endswith('/stream/'):
+            try:
+                match = resolve(scope['path'],
+                                urlconf=settings.ASYNC_ROOT_URLCONF)
+            except Resolver404:
+                match = None
+            if match and match.view_name == 'blog:comment_stream':
+                return await asgi_comment_stream(
+                    scope, receive, send, match.kwargs['post_id'],
+                )
+        return await application(scope, receive, send)
+
+    return router
@@ -0,0 +1,11 @@
+from django import template
+
+from blog import category_stats
+
+register = template.Library()
+
+
+@register.simple_tag
+def category_sidebar():
+    '''Навигация по категориям: кешированный фрагмент blog.category_stats.'''
+    return category_stats.render('django')
@@ -0,0 +1,244 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from blog import post_state
+from blog.models import Comment, Follow, Post, TimelineEntry
+from blog.registry import categories, with_cached_relations
+from core import cache
+from core.retry import retry_write
+
+# MAX_ENTRIES — предел ленты пользователя; посты авторов, у которых
+# подписчиков больше FANOUT_LIMIT, не раскладываются по лентам, а
+# подмешиваются при чтении.
+DEFAULTS = {
+    'MAX_ENTRIES': 500,
+    'FANOUT_LIMIT': 1000,
+    'PAGE_SIZE': 10,
+    'BATCH_SIZE': 500,
+}
+HEAVY_KEY = 'timeline:heavy'
+HEAVY_TAG = 'timeline:heavy'
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'TIMELINE', {})}
+
+
+def heavy_authors():
+    '''Авторы, у которых подписчиков больше FANOUT_LIMIT.'''
+    return cache.get_or_set(HEAVY_KEY, lambda: set(
+        Follow.objects.values('author').annotate(
+            followers=Count('pk')
+        ).filter(
+            followers__gt=config()['FANOUT_LIMIT']
+        ).values_list('author', flat=True)
+    ), tags=[HEAVY_TAG])
+
+
+def check_heavy(author_id):
+    '''Сбрасывает кеш heavy_authors(), если автор пересёк предел.'''
+    limit = config()['FANOUT_LIMIT']
+    if Follow.objects.filter(author_id=author_id).count() in (
+        limit, limit + 1
+    ):
+        cache.invalidate(HEAVY_TAG)
+
+
+def eligible(post):
+    '''Пост попадает в ленты: опубликован в опубликованной категории.
+
+    Дата публикации проверяется при чтении, поэтому отложенный пост
+    раскладывается сразу и появляется в лентах в свой срок.
+    '''
+    return bool(
+        post.is_published and post.category and post.category.is_published
+    )
+
+
+@retry_write(name='timeline.insert')
+def insert(entries):
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+@retry_write(name='timeline.trim')
+def trim(user_ids):
+    '''Удаляет записи сверх MAX_ENTRIES у переполненных лент.'''
+    cap = config()['MAX_ENTRIES']
+    over = TimelineEntry.objects.filter(user__in=user_ids).values(
+        'user'
+    ).annotate(entries=Count('pk')).filter(
+        entries__gt=cap
+    ).values_list('user', flat=True)
+    for user_id in list(over):
+        entries = TimelineEntry.objects.filter(user_id=user_id)
+        pub_date, post_id = entries.order_by(
+            '-pub_date', '-post_id'
+        ).values_list('pub_date', 'post_id')[cap - 1]
+        entries.filter(
+            before((pub_date, post_id), 'pub_date', 'post_id')
+        ).delete()
+
+
+def followers(author_id):
+    '''Подписчики автора пачками по keyset user_id.'''
+    size, last = config()['BATCH_SIZE'], 0
+    while True:
+        batch = list(Follow.objects.filter(
+            author_id=author_id, user_id__gt=last
+        ).order_by('user_id').values_list('user_id', flat=True)[:size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def spread(author_id, rows):
+    '''Записи (post_id, pub_date) в ленты всех подписчиков автора.'''
+    for user_ids in followers(author_id):
+        insert([
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for user_id in user_ids for pk, pub_date in rows
+        ])
+        trim(user_ids)
+
+
+def fan_out(posts):
+    '''Раскладывает посты по лентам подписчиков их авторов.'''
+    heavy = heavy_authors()
+    by_author = defaultdict(list)
+    for post in posts:
+        if post.author_id not in heavy and eligible(post):
+            by_author[post.author_id].append((post.pk, post.pub_date))
+    for author_id, rows in by_author.items():
+        spread(author_id, rows)
+
+
+def latest(author_id):
+    '''(pk, pub_date) последних MAX_ENTRIES постов автора для лент.'''
+    return list(Post.objects.filter(
+        author_id=author_id, is_published=True, category__is_published=True,
+    ).order_by('-pub_date').values_list('pk', 'pub_date')[
+        :config()['MAX_ENTRIES']
+    ])
+
+
+def was_eligible(old):
+    '''eligible() для состояния поста до сохранения (post_state).'''
+    if old is None:
+        return False
+    category_id, is_published, _ = old
+    if not is_published or category_id is None:
+        return False
+    category = categories.get(pk=category_id)
+    return bool(category and category.is_published)
+
+
+def sync_post(post, old):
+    '''Приводит ленты в соответствие с сохранённым постом.
+
+    Раскладка — только когда пост стал видимым; у уже разложенного
+    поста меняется лишь pub_date записей.
+    '''
+    before_save, now = was_eligible(old), eligible(post)
+    entries = TimelineEntry.objects.filter(post=post)
+    if before_save and not now:
+        retry_write(entries.delete, name='timeline.sync_post')()
+    elif before_save and old[2] != post.pub_date:
+        retry_write(entries.update, name='timeline.sync_post')(
+            pub_date=post.pub_date
+        )
+    elif now and not before_save:
+        fan_out([post])
+
+
+def post_saved(sender, instance, raw=False, **kwargs):
+    old = post_state.previous(instance)
+    if not raw and old is not post_state.UNCHANGED:
+        transaction.on_commit(lambda: sync_post(instance, old))
+
+
+def follow(user, author):
+    '''Подписка с заполнением ленты последними постами автора.'''
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if not created:
+        return
+    check_heavy(author.pk)
+    if author.pk in heavy_authors():
+        return
+    insert([
+        TimelineEntry(user=user, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in latest(author.pk)
+    ])
+    trim([user.pk])
+
+
+def unfollow(user, author):
+    '''Отписка; автора, ставшего «лёгким», раскладываем заново.
+
+    Пока подписчиков было больше FANOUT_LIMIT, его посты читались при
+    открытии ленты и в записи не попадали.
+    '''
+    was_heavy = author.pk in heavy_authors()
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    if not deleted:
+        return
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+    check_heavy(author.pk)
+    if was_heavy and author.pk not in heavy_authors():
+        transaction.on_commit(lambda: spread(author.pk, latest(author.pk)))
+
+
+def before(cursor, pub_date, pk):
+    '''Условие keyset: строки после (pub_date, pk) из cursor.'''
+    if cursor is None:
+        return Q()
+    value, last = cursor
+    return Q(**{f'{pub_date}__lt': value}) | Q(
+        **{pub_date: value, f'{pk}__lt': last}
+    )
+
+
+def page(user, cursor=None):
+    '''Страница ленты подписок: (посты, (pub_date, pk) последнего или None).
+
+    Разложенные записи читаются по индексу ленты, посты «тяжёлых»
+    авторов — по их постам; обе выборки ограничены размером страницы
+    и сливаются по (pub_date, pk).
+    '''
+    size = config()['PAGE_SIZE']
+    # Одним filter(): условия на записи ленты относятся к одному JOIN.
+    queries = [Post.objects.published().filter(
+        Q(timeline_entries__user=user),
+        before(cursor, 'timeline_entries__pub_date', 'timeline_entries__post'),
+    ).order_by('-timeline_entries__pub_date', '-timeline_entries__post')]
+    heavy = heavy_authors()
+    if heavy:
+        followed = set(
+            user.following.values_list('author_id', flat=True)
+        ) & heavy
+        if followed:
+            queries.append(Post.objects.published().filter(
+                before(cursor, 'pub_date', 'pk'), author__in=followed,
+            ).order_by('-pub_date', '-pk'))
+    posts = {}
+    for queryset in queries:
+        for post in with_cached_relations(
+            queryset.select_related('author')
+        )[:size + 1]:
+            posts[post.pk] = post
+    posts = sorted(
+        posts.values(), key=lambda post: (post.pub_date, post.pk),
+        reverse=True,
+    )
+    more = len(posts) > size
+    posts = posts[:size]
+    counts = dict(Comment.objects.filter(
+        post__in=[post.pk for post in posts]
+    ).values('post').annotate(count=Count('pk')).values_list('post', 'count'))
+    for post in posts:
+        post.comment_count = counts.get(post.pk, 0)
+    last = posts[-1] if more else None
+    return posts, last and (last.pub_date, last.pk)
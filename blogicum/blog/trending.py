@@ -0,0 +1,161 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from blog.counters import post_views
+from blog.models import Comment, Post, TrendingPost
+from core.cache import get_cache
+from core.retry import retry_write
+
+# Оценка затухает вдвое за HALF_LIFE секунд. Поколение длиной GENERATION
+# ограничивает показатель степени: при переходе оценки пересчитываются
+# к началу нового поколения, старше прошлого — удаляются.
+DEFAULTS = {
+    'HALF_LIFE': 6 * 3600,
+    'GENERATION': 24 * 3600,
+    'COMMENT_WEIGHT': 5.0,
+    'VIEW_WEIGHT': 1.0,
+    'SIZE': 20,
+}
+ROLLOVER_KEY = 'trending:generation'
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'TRENDING', {})}
+
+
+def generation(now):
+    return int(now // config()['GENERATION'])
+
+
+def boost(now):
+    '''Множитель веса события в момент now внутри его поколения.'''
+    options = config()
+    offset = now - generation(now) * options['GENERATION']
+    return 2 ** (offset / options['HALF_LIFE'])
+
+
+def carry():
+    '''Множитель оценки прошлого поколения при переходе в следующее.'''
+    options = config()
+    return 2 ** (-options['GENERATION'] / options['HALF_LIFE'])
+
+
+def record(weights, now=None):
+    '''Добавляет веса {post_id: вес} событий момента now к оценкам.
+
+    Строки создаются через bulk_create(ignore_conflicts) и меняются
+    UPDATE с F(): параллельные записи не теряют приращений. Строка
+    прошлого поколения пересчитывается тем же UPDATE, остальные —
+    rollover() при первой записи в поколении.
+    '''
+    now = time.time() if now is None else now
+    rollover(now)
+    current, factor = generation(now), boost(now)
+    groups = defaultdict(list)
+    for pk, weight in weights.items():
+        groups[weight * factor].append(pk)
+
+    @retry_write(name='trending.record')
+    def write():
+        existing = set(Post.objects.filter(
+            pk__in=list(weights)
+        ).values_list('pk', flat=True))
+        TrendingPost.objects.bulk_create([
+            TrendingPost(post_id=pk, generation=current)
+            for pk in existing
+        ], ignore_conflicts=True)
+        for delta, pks in groups.items():
+            TrendingPost.objects.filter(
+                post_id__in=[pk for pk in pks if pk in existing]
+            ).update(generation=current, score=Case(
+                When(generation=current, then=F('score')),
+                When(generation=current - 1, then=F('score') * carry()),
+                default=Value(0.0),
+            ) + delta)
+    write()
+
+
+def rollover(now=None):
+    '''Переводит в текущее поколение оценки постов без новых событий.
+
+    Выполняется один раз на поколение при записи оценок (record):
+    отметка хранится в общем кеше. Чтение (top) не пишет в БД.
+    '''
+    current = generation(time.time() if now is None else now)
+    cache = get_cache()
+    if cache.get(ROLLOVER_KEY) == current:
+        return
+
+    @retry_write(name='trending.rollover')
+    def write():
+        TrendingPost.objects.filter(generation=current - 1).update(
+            generation=current, score=F('score') * carry(),
+        )
+        TrendingPost.objects.filter(generation__lt=current - 1).delete()
+    write()
+    cache.set(ROLLOVER_KEY, current, timeout=None)
+
+
+def top(now=None):
+    '''Опубликованные посты двух последних поколений по убыванию оценки.
+
+    Оценки прошлого поколения, ещё не перенесённые rollover(),
+    пересчитываются к текущему в запросе.
+    '''
+    current = generation(time.time() if now is None else now)
+    return Post.objects.published().filter(
+        trending__generation__gte=current - 1
+    ).annotate(trending_score=Case(
+        When(trending__generation=current, then=F('trending__score')),
+        default=F('trending__score') * carry(),
+    )).order_by('-trending_score')
+
+
+def rebuild(now=None):
+    '''Пересчитывает оценки по комментариям двух последних поколений.
+
+    Нужен после массовой загрузки: bulk_create не отправляет сигналы.
+    Просмотры хранятся без времени и в пересчёт не входят.
+    '''
+    now = time.time() if now is None else now
+    options = config()
+    start = (generation(now) - 1) * options['GENERATION']
+    weights = defaultdict(float)
+    for post_id, created_at in Comment.objects.filter(
+        created_at__gte=datetime.fromtimestamp(start, timezone.utc),
+        created_at__lte=datetime.fromtimestamp(now, timezone.utc),
+    ).values_list('post_id', 'created_at').iterator():
+        moment = created_at.timestamp()
+        weight = options['COMMENT_WEIGHT'] * boost(moment)
+        if generation(moment) < generation(now):
+            weight *= carry()
+        weights[post_id] += weight
+
+    @retry_write(name='trending.rebuild')
+    def write():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create([
+            TrendingPost(post_id=pk, generation=generation(now), score=score)
+            for pk, score in weights.items()
+        ], batch_size=500)
+    write()
+    get_cache().set(ROLLOVER_KEY, generation(now), timeout=None)
+    return len(weights)
+
+
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: record(
+            {instance.post_id: config()['COMMENT_WEIGHT']}
+        ))
+
+
+def views_flushed(sender, deltas, **kwargs):
+    if sender is post_views:
+        weight = config()['VIEW_WEIGHT']
+        record({pk: weight * delta for pk, delta in deltas.items()})
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, sitemaps, streams, views
 
 
 app_name = 'blog'
@@ -16,6 +16,10 @@ urlpatterns = [
          views.CommentUpdateView.as_view(), name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.CommentDeleteView.as_view(), name='delete_comment'),
+    path('posts/<int:post_id>/comments/stream/', streams.comment_stream,
+         name='comment_stream'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/',
+         streams.comment_fragment, name='comment_fragment'),
     path('posts/<int:post_id>/', views.PostDetailView.as_view(),
          name='post_detail'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
@@ -27,5 +31,35 @@ urlpatterns = [
         'profile/<slug:username>/',
         views.ProfileListView.as_view(), name='profile'
     ),
+    path('trending/', views.TrendingListView.as_view(), name='trending'),
+    path('profile/<slug:username>/follow/', views.FollowView.as_view(),
+         name='follow'),
+    path('profile/<slug:username>/unfollow/',
+         views.FollowView.as_view(follow=False), name='unfollow'),
+    path('timeline/', views.TimelineView.as_view(), name='timeline'),
     path('', views.IndexListView.as_view(), name='index'),
+    path('api/posts/', api.PostListApiView.as_view(), name='api_posts'),
+    path('api/posts/import/', api.PostImportApiView.as_view(),
+         name='api_import_posts'),
+    path('api/posts/<int:post_id>/', api.PostApiView.as_view(),
+         name='api_post'),
+    path('api/posts/<int:post_id>/comments/',
+         api.CommentListApiView.as_view(), name='api_comments'),
+    path('api/categories/<slug:category_slug>/posts/',
+         api.CategoryPostListApiView.as_view(), name='api_category_posts'),
+    path('api/users/<slug:username>/posts/',
+         api.AuthorPostListApiView.as_view(), name='api_author_posts'),
+    path('feeds/rss/', feeds.PostsFeed.as_view(), name='feed_rss'),
+    path('feeds/atom/', feeds.PostsAtomFeed.as_view(), name='feed_atom'),
+    path('feeds/category/<slug:category_slug>/rss/',
+         feeds.CategoryFeed.as_view(), name='category_feed_rss'),
+    path('feeds/category/<slug:category_slug>/atom/',
+         feeds.CategoryAtomFeed.as_view(), name='category_feed_atom'),
+    path('feeds/profile/<slug:username>/rss/',
+         feeds.AuthorFeed.as_view(), name='profile_feed_rss'),
+    path('feeds/profile/<slug:username>/atom/',
+         feeds.AuthorAtomFeed.as_view(), name='profile_feed_atom'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>-<int:shard>.xml', sitemaps.sitemap_section,
+         name='sitemap_section'),
 ]
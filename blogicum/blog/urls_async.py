@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = urls.app_name
+
+ASYNC_VIEWS = {
+    'index': async_views.IndexListView,
+    'category_posts': async_views.CategoryListView,
+    'profile': async_views.ProfileListView,
+    'post_detail': async_views.PostDetailView,
+}
+
+# Те же маршруты, что в blog.urls, чтобы reverse() давал прежние адреса.
+urlpatterns = [
+    path(
+        str(pattern.pattern), ASYNC_VIEWS[pattern.name].as_view(),
+        name=pattern.name,
+    ) if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in urls.urlpatterns
+]
@@ -1,17 +1,103 @@
+from django.conf import settings
 from django.db.models import Count
+from django.http import Http404, StreamingHttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
+from django.template import engines
 from django.urls import reverse, reverse_lazy
 from django.views.generic import (
-    CreateView, DeleteView, DetailView, ListView, UpdateView
+    CreateView, DeleteView, DetailView, ListView, UpdateView, View
 )
 
-from blog.models import Category, Comment, Post, User
+from blog import timeline, trending
+from blog.api import ApiError, decode_cursor, encode_cursor
+from blog.counters import post_views
+from blog.models import Comment, Follow, Post, User
+from blog.registry import categories, with_cached_relations
+from core.retry import retry_write
+from core.routers import replica_reads
 from .forms import CommentForm, PostForm, UserForm
 
 
-class CommentMixin:
+class WriteRetryMixin:
+    '''Mixin: повтор записи в БД при блокировке (core.retry).'''
+
+    def form_valid(self, form):
+        return retry_write(
+            super().form_valid, name=f'{type(self).__name__}.form_valid'
+        )(form)
+
+    def delete(self, request, *args, **kwargs):
+        return retry_write(
+            super().delete, name=f'{type(self).__name__}.delete'
+        )(request, *args, **kwargs)
+
+
+class TemplateEngineMixin:
+    '''Mixin: рендеринг Jinja2 для маршрутов из settings.JINJA2_VIEWS.'''
+
+    @property
+    def template_engine(self):
+        if self.request.resolver_match.url_name in settings.JINJA2_VIEWS:
+            return 'jinja2'
+        return None
+
+
+class StreamingListMixin:
+    '''Mixin: потоковая отдача списков из settings.STREAMING_VIEWS.
+
+    Сначала отправляется начало страницы до блока posts, затем
+    карточки постов по мере чтения строк из .iterator(), в конце —
+    пагинатор и остаток страницы.
+    '''
+
+    stream_template_name = 'blog/stream.html'
+    stream_marker = 'STREAM-POSTS-8f41c2'
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.resolver_match.url_name not in (
+            settings.STREAMING_VIEWS
+        ):
+            return super().render_to_response(context, **response_kwargs)
+        object_list = context['page_obj'].object_list
+        # Базу выбираем сейчас: генератор работает уже после dispatch.
+        rows = object_list.using(object_list.db).iterator()
+        response_kwargs.setdefault('content_type', self.content_type)
+        return StreamingHttpResponse(
+            self.stream(context, rows), **response_kwargs
+        )
+
+    def stream(self, context, rows):
+        engine = engines[self.template_engine or 'django']
+        page = engine.get_template(self.stream_template_name).render({
+            **context,
+            'page_template': self.get_template_names()[0],
+            'stream_marker': self.stream_marker,
+        }, self.request)
+        head, tail = page.split(self.stream_marker)
+        yield head
+        card = engine.get_template('includes/post_article.html')
+        for post in rows:
+            yield card.render({'post': post})
+        yield engine.get_template('includes/paginator.html').render(
+            {'page_obj': context['page_obj']}
+        )
+        yield tail
+
+
+class ReplicaReadMixin:
+    '''Mixin: чтение данных страницы с реплики (core.routers).'''
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class CommentMixin(WriteRetryMixin):
     '''Mixin для редактирования и удаления комментария.'''
 
     model = Comment
@@ -31,7 +117,7 @@ class CommentMixin:
         )
 
 
-class PostMixin:
+class PostMixin(WriteRetryMixin):
     '''Mixin для редактирования и удаления поста'''
 
     model = Post
@@ -39,13 +125,18 @@ class PostMixin:
     template_name = 'blog/create.html'
     pk_url_kwarg = 'post_id'
 
+    def get_queryset(self):
+        return super().get_queryset().defer('views')
+
     def dispatch(self, request, *args, **kwargs):
         if self.get_object().author != self.request.user:
             return redirect('blog:post_detail', self.kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
 
 
-class IndexListView(ListView):
+class IndexListView(
+        StreamingListMixin, TemplateEngineMixin, ReplicaReadMixin, ListView
+):
     '''Главная страница.'''
 
     model = Post
@@ -53,16 +144,25 @@ class IndexListView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return Post.objects.select_related(
-            'location', 'author', 'category'
-        ).filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True,
-        ).order_by('-pub_date').annotate(comment_count=Count('comments'))
+        return with_cached_relations(
+            Post.objects.published().select_related('author')
+            .order_by('-pub_date').annotate(comment_count=Count('comments'))
+        )
+
+
+class TrendingListView(TemplateEngineMixin, ReplicaReadMixin, ListView):
+    '''Популярное: топ постов по затухающей оценке (blog.trending).'''
 
+    template_name = 'blog/trending.html'
 
-class PostDetailView(DetailView):
+    def get_queryset(self):
+        return with_cached_relations(
+            trending.top().select_related('author')
+            .annotate(comment_count=Count('comments'))
+        )[:trending.config()['SIZE']]
+
+
+class PostDetailView(TemplateEngineMixin, ReplicaReadMixin, DetailView):
     '''Страница отдельного поста.'''
 
     model = Post
@@ -70,20 +170,19 @@ class PostDetailView(DetailView):
     success_url = reverse_lazy('blog:index')
     pk_url_kwarg = 'post_id'
 
+    def get_queryset(self):
+        return with_cached_relations(Post.objects.select_related('author'))
+
     def dispatch(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if (
-            (instance.author != request.user)
-            and (
-                not instance.is_published
-                or (
-                    instance.category and not instance.category.is_published
-                ) or instance.pub_date > timezone.now()
-            )
-        ):
+        if not self.get_object().is_visible_to(request.user):
             return render(request, 'pages/404.html', status=404)
         return super().dispatch(request, *args, **kwargs)
 
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        post_views.incr(self.object.pk)
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
@@ -92,6 +191,8 @@ class PostDetailView(DetailView):
                 'author'
             ).order_by('created_at')
         )
+        # Потоки SSE обслуживает только ASGI-приложение (blog.streams).
+        context['comment_stream'] = isinstance(self.request, ASGIRequest)
         return context
 
     def get_success_url(self):
@@ -100,7 +201,9 @@ class PostDetailView(DetailView):
         )
 
 
-class CategoryListView(ListView):
+class CategoryListView(
+        StreamingListMixin, TemplateEngineMixin, ReplicaReadMixin, ListView
+):
     '''Страница отдельной категории.'''
 
     template_name = 'blog/category.html'
@@ -108,19 +211,15 @@ class CategoryListView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        self.category = get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True)
-
-        post_list = Post.objects.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now(),
+        self.category = categories.get(slug=self.kwargs['category_slug'])
+        if self.category is None or not self.category.is_published:
+            raise Http404('Категория не найдена.')
+
+        post_list = Post.objects.published().select_related('author').filter(
             category=self.category
         ).order_by('-pub_date').annotate(comment_count=Count('comments'))
 
-        return post_list
+        return with_cached_relations(post_list)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -128,7 +227,9 @@ class CategoryListView(ListView):
         return context
 
 
-class ProfileListView(ListView):
+class ProfileListView(
+        StreamingListMixin, TemplateEngineMixin, ReplicaReadMixin, ListView
+):
     '''Страница профиля пользователя.'''
 
     model = User
@@ -139,30 +240,70 @@ class ProfileListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile'] = User.objects.get(username=self.kwargs['username'])
+        user = self.request.user
+        context['is_following'] = (
+            user.is_authenticated and user != context['profile']
+            and Follow.objects.filter(
+                user=user, author=context['profile']
+            ).exists()
+        )
         return context
 
     def get_queryset(self):
         self.author = get_object_or_404(User, username=self.kwargs['username'])
         if self.request.user.username == self.kwargs['username']:
-            return Post.objects.select_related(
-                'location', 'category', 'author'
+            return with_cached_relations(Post.objects.select_related(
+                'author'
             ).filter(
                 author=self.author
             ).order_by('-pub_date').annotate(
                 comment_count=Count('comments')
-            )
-
-        return Post.objects.select_related(
-            'location', 'category', 'author'
-        ).filter(
-            author=self.author,
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True,
-        ).order_by('-pub_date').annotate(comment_count=Count('comments'))
+            ))
+
+        return with_cached_relations(
+            Post.objects.published().select_related('author').filter(
+                author=self.author
+            ).order_by('-pub_date').annotate(comment_count=Count('comments'))
+        )
+
+
+class FollowView(LoginRequiredMixin, View):
+    '''Подписка на автора (follow = False — отписка).'''
+
+    follow = True
+    http_method_names = ['post']
+
+    def post(self, request, username):
+        author = get_object_or_404(User, username=username)
+        if author != request.user:
+            action = timeline.follow if self.follow else timeline.unfollow
+            retry_write(action, name='FollowView.post')(request.user, author)
+        return redirect('blog:profile', username)
+
+
+class TimelineView(
+        LoginRequiredMixin, TemplateEngineMixin, ReplicaReadMixin, ListView
+):
+    '''Лента подписок: keyset-страницы по (pub_date, id).'''
+
+    template_name = 'blog/timeline.html'
+
+    def get_queryset(self):
+        cursor = self.request.GET.get('cursor')
+        try:
+            cursor = decode_cursor(cursor) if cursor else None
+        except ApiError:
+            raise Http404
+        posts, self.last = timeline.page(self.request.user, cursor)
+        return posts
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.last and encode_cursor(*self.last)
+        return context
 
 
-class ProfileUpdateView(LoginRequiredMixin, UpdateView):
+class ProfileUpdateView(LoginRequiredMixin, WriteRetryMixin, UpdateView):
     '''редактирование страницы профиля пользователя.'''
 
     model = User
@@ -179,7 +320,7 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         )
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, WriteRetryMixin, CreateView):
     '''Страница написания поста.'''
 
     model = Post
@@ -211,7 +352,7 @@ class PostDeleteView(LoginRequiredMixin, PostMixin, DeleteView):
     success_url = reverse_lazy('blog:index')
 
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(LoginRequiredMixin, WriteRetryMixin, CreateView):
     '''Страница написания комментария.'''
 
     model = Comment
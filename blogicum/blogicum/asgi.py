@@ -2,6 +2,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings_asgi')
 
 application = get_asgi_application()
+
+# Импорт моделей blog возможен только после django.setup().
+from blog.streams import with_comment_streams  # noqa: E402
+
+application = with_comment_streams(application)
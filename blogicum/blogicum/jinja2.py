@@ -0,0 +1,51 @@
+from django.templatetags.static import static
+from django.template.defaultfilters import (
+    date, escapejs, linebreaksbr, truncatewords
+)
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.timezone import template_localtime
+from django_bootstrap5.templatetags.django_bootstrap5 import (
+    bootstrap_button, bootstrap_css, bootstrap_form
+)
+from jinja2 import Environment
+
+from blog import category_stats
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def render_value(value):
+    '''Вывод переменной как в шаблонах Django.
+
+    Повторяет django.template.base.render_value_in_context: местное
+    время, локализация и экранирование django.utils.html.escape,
+    чтобы вывод совпадал с Django-шаблонами побайтно.
+    '''
+    value = localize(template_localtime(value))
+    if not isinstance(value, str):
+        value = str(value)
+    return conditional_escape(value)
+
+
+def environment(**options):
+    options.setdefault('keep_trailing_newline', True)
+    env = Environment(finalize=render_value, **options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'bootstrap_css': bootstrap_css,
+        'bootstrap_form': bootstrap_form,
+        'bootstrap_button': bootstrap_button,
+        'category_sidebar': lambda: category_stats.render('jinja2'),
+    })
+    env.filters.update({
+        'date': lambda value, arg=None: date(template_localtime(value), arg),
+        'truncatewords': truncatewords,
+        'escapejs': escapejs,
+        'linebreaksbr': lambda value: linebreaksbr(value, autoescape=True),
+    })
+    return env
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -28,15 +29,24 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.template_timing.TemplateTimingMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
+    'core.middleware.AsyncURLConfMiddleware',
+    'core.registry.RegistryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Панель отладки — синхронный middleware: под ASGI он переводил бы весь
+# стек в поток, поэтому blogicum.settings_asgi её не подключает.
+DEBUG_TOOLBAR_MIDDLEWARE = 'debug_toolbar.middleware.DebugToolbarMiddleware'
+if DEBUG:
+    MIDDLEWARE.append(DEBUG_TOOLBAR_MIDDLEWARE)
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -49,8 +59,13 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Кеширующий загрузчик с замером рендеринга
+            # (core.template_timing).
+            'loaders': [('core.template_timing.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ])],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -59,8 +74,30 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'blogicum.jinja2.environment',
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    },
 ]
 
+# Имена маршрутов blog, страницы которых рендерятся шаблонами Jinja2
+# из каталога jinja2/ (например, 'index', 'category_posts', 'profile',
+# 'post_detail').
+JINJA2_VIEWS = ()
+
+# Имена маршрутов-списков blog ('index', 'category_posts', 'profile'),
+# которые отдаются потоком: начало страницы уходит клиенту до выборки
+# постов.
+STREAMING_VIEWS = ()
+
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
@@ -72,6 +109,135 @@ DATABASES = {
     }
 }
 
+# Локальная реплика: копия основной базы, обновляется sync_replica.
+if os.environ.get('BLOGICUM_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['BLOGICUM_SQLITE_REPLICA'],
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+DATABASE_REPLICAS = ['replica']
+
+REPLICA_APPS = ('blog',)
+
+READ_YOUR_WRITES_COOKIE = 'pin_primary'
+
+READ_YOUR_WRITES_WINDOW = 10
+
+# Применяются к каждому новому соединению SQLite (core.sqlite.apply_pragmas).
+# Ожидание блокировки задаёт только busy_timeout: OPTIONS['timeout'] в
+# DATABASES он бы переопределил.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+# Повтор записи при блокировке БД (core.retry.retry_write).
+WRITE_RETRY = {
+    'ATTEMPTS': 5,
+    'BASE_DELAY': 0.05,
+    'MAX_DELAY': 1.0,
+    'DEADLINE': 5.0,
+}
+
+# ASGI: страницы чтения обслуживают асинхронные представления из
+# ASYNC_ROOT_URLCONF, ORM выполняется в пуле из ASYNC_READ_WORKERS
+# потоков (core.executor). DebugToolbarMiddleware только синхронный:
+# с ним Django переводит весь стек middleware в один поток.
+ASYNC_ROOT_URLCONF = 'blogicum.urls_async'
+
+ASYNC_READ_WORKERS = 8
+
+# SSE новых комментариев (blog.streams): интервал heartbeat и время
+# простоя до закрытия потока в секундах, очередь сообщений на одно
+# соединение и предел одновременных соединений процесса. Потоки
+# обслуживает только blogicum.asgi; под WSGI страница поста их не
+# открывает, а маршрут отвечает 204.
+COMMENT_STREAM = {
+    'HEARTBEAT': 15,
+    'IDLE_TIMEOUT': 300,
+    'QUEUE_SIZE': 32,
+    'MAX_CONNECTIONS': 100,
+}
+
+# Буферы счётчиков (core.counters, просмотры постов): приращения
+# сбрасываются в БД одним UPDATE раз в FLUSH_INTERVAL секунд или по
+# накоплении FLUSH_SIZE.
+VIEW_COUNTERS = {
+    'FLUSH_INTERVAL': 10.0,
+    'FLUSH_SIZE': 1000,
+}
+
+# Популярное (blog.trending): оценка затухает вдвое за HALF_LIFE секунд,
+# комментарий и просмотр весят COMMENT_WEIGHT и VIEW_WEIGHT, на
+# странице SIZE постов.
+TRENDING = {
+    'HALF_LIFE': 6 * 3600,
+    'GENERATION': 24 * 3600,
+    'COMMENT_WEIGHT': 5.0,
+    'VIEW_WEIGHT': 1.0,
+    'SIZE': 20,
+}
+
+# Лента подписок (blog.timeline): не больше MAX_ENTRIES записей на
+# пользователя; посты авторов с числом подписчиков больше FANOUT_LIMIT
+# не раскладываются по лентам, а читаются при открытии ленты.
+TIMELINE = {
+    'MAX_ENTRIES': 500,
+    'FANOUT_LIMIT': 1000,
+    'PAGE_SIZE': 10,
+    'BATCH_SIZE': 500,
+}
+
+# Кеш core.cache с тегами и справочники core.registry. LocMemCache у
+# каждого процесса свой: при нескольких воркерах нужен общий бэкенд
+# (Memcached, Redis), иначе сброс тегов и версий справочников в одном
+# воркере не виден другим, и они отдают устаревшие записи.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+}
+
+TAGGED_CACHE = 'default'
+
+# Каталог готовых файлов карты сайта (manage.py build_sitemaps). Пока
+# файла нет или SITEMAP_DIR = None, карта сайта строится на лету.
+SITEMAP_DIR = None
+
+# Замер рендеринга шаблонов у доли запросов (core.template_timing).
+TEMPLATE_TIMING = {
+    'SAMPLE_RATE': 0.1,
+    'LOG_THRESHOLD_MS': 50,
+    'LOG_TOP': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,6 +272,15 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Сессии в БД. С общим кешем (Memcached, Redis) сессии и пользователя
+# сессии можно читать из него: SESSION_ENGINE = 'django.contrib.sessions.
+# backends.cached_db' и AUTHENTICATION_BACKENDS = ['blog.backends.
+# CachedModelBackend']. С кешем процесса (LocMemCache) проверка
+# blog.E001/E002 не даст их включить.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
 LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
@@ -0,0 +1,5 @@
+# Настройки для blogicum.asgi: те же, без синхронных middleware.
+from blogicum.settings import *  # noqa: F401, F403
+from blogicum.settings import DEBUG_TOOLBAR_MIDDLEWARE, MIDDLEWARE
+
+MIDDLEWARE = [name for name in MIDDLEWARE if name != DEBUG_TOOLBAR_MIDDLEWARE]
@@ -2,11 +2,14 @@ import debug_toolbar
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
+from core.views import db_health, metrics_view
 from . import views
 
 urlpatterns = [
     path('pages/', include('pages.urls', namespace='pages')),
     path('admin/', admin.site.urls),
+    path('health/db/', db_health, name='db_health'),
+    path('metrics/', metrics_view, name='metrics'),
     path('', include('blog.urls', namespace='blog')),
     path('auth/registration/',
          views.RegistrationCreateView.as_view(),
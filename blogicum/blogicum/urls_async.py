@@ -0,0 +1,11 @@
+from django.urls import include, path
+
+from .urls import (  # noqa: F401
+    handler404, handler500, urlpatterns as sync_urlpatterns
+)
+
+urlpatterns = [
+    path('', include('blog.urls_async', namespace='blog'))
+    if getattr(pattern, 'namespace', None) == 'blog' else pattern
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,90 @@
+import json
+import math
+import time
+
+
+class QueryTimer:
+    '''execute_wrapper: считает запросы и суммарное время SQL.'''
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def histogram(samples, bounds=HISTOGRAM_BOUNDS_MS):
+    '''Число замеров по корзинам «не больше N мс»; последняя — остальные.'''
+    counts = dict.fromkeys([f'<={bound}' for bound in bounds], 0)
+    counts[f'>{bounds[-1]}'] = 0
+    for value in samples:
+        for bound in bounds:
+            if value <= bound:
+                counts[f'<={bound}'] += 1
+                break
+        else:
+            counts[f'>{bounds[-1]}'] += 1
+    return counts
+
+
+def percentile(values, p):
+    '''Перцентиль по методу ближайшего ранга.'''
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    return {
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': sum(samples) / len(samples) if samples else 0.0,
+        'max': max(samples, default=0.0),
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def dump(results, path):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(results, fh, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, threshold, metrics=('p50', 'p95'),
+            exact=('queries',)):
+    '''Сравнивает результаты с базовыми, возвращает список регрессий.
+
+    Метрика из metrics считается регрессией, если выросла больше чем
+    на threshold (доля) от базового значения; метрика из exact — при
+    любом росте.
+    '''
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in (*metrics, *exact):
+            old, new = base.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            allowed = 0 if metric in exact else threshold
+            if new > old * (1 + allowed) and new - old > 1e-9:
+                regressions.append(
+                    f'{name}: {metric} {old:.4g} -> {new:.4g}'
+                )
+    return regressions
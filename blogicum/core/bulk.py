@@ -0,0 +1,58 @@
+from django.db import connections, router, transaction
+from django.db.models import Max, QuerySet
+
+
+def timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+class RawInsertQuerySet(QuerySet):
+    '''QuerySet, чей INSERT идёт в режиме raw, как при загрузке фикстур.'''
+
+    def _insert(self, *args, raw=False, **kwargs):
+        return super()._insert(*args, raw=True, **kwargs)
+
+
+def raw_bulk_create(model, objs, using=None, **kwargs):
+    '''bulk_create, который пишет даты auto_now/auto_now_add как заданы.
+
+    INSERT выполняется в режиме raw, как Model.save_base(raw=True) при
+    loaddata: pre_save полей не вызывается, и заданные даты попадают
+    в тот же INSERT. Незаданные даты (None) заранее заполняет обычный
+    pre_save — так загружаются и дампы, снятые до появления поля.
+    '''
+    for field in timestamp_fields(model):
+        for obj in objs:
+            if getattr(obj, field.attname) is None:
+                field.pre_save(obj, add=True)
+    return RawInsertQuerySet(model, using=using).bulk_create(objs, **kwargs)
+
+
+def bulk_insert(model, objs, batch_size=1000):
+    '''bulk_create с сохранением дат; проставляет объектам pk и
+    возвращает их по порядку.
+
+    Если бэкенд не возвращает pk из bulk_create (SQLite в Django 3.2),
+    новые строки — последние len(objs) с pk больше прежнего максимума.
+    Это верно внутри одной транзакции: SQLite держит блокировку записи
+    с первой вставки до фиксации, и чужие строки не встанут между
+    нашими. На бэкендах без такой блокировки и без возврата pk
+    вызывающий код должен быть единственным писателем в таблицу.
+    '''
+    using = router.db_for_write(model)
+    manager = model._base_manager.db_manager(using)
+    returns_pks = connections[using].features.can_return_rows_from_bulk_insert
+    with transaction.atomic(using=using):
+        last_pk = manager.aggregate(last=Max('pk'))['last'] or 0
+        raw_bulk_create(model, objs, using=using, batch_size=batch_size)
+        if not returns_pks:
+            pks = manager.filter(pk__gt=last_pk).order_by(
+                '-pk'
+            ).values_list('pk', flat=True)[:len(objs)]
+            for obj, pk in zip(objs, reversed(pks)):
+                obj.pk = pk
+        return [obj.pk for obj in objs]
@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from core import metrics
+
+# Тег всех записей: сбрасывается после массовой загрузки без сигналов.
+ALL = 'all'
+KEY_PREFIX = 'tagged'
+
+
+# Бэкенды, у которых каждый процесс видит только свои записи.
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_cache():
+    return caches[getattr(settings, 'TAGGED_CACHE', DEFAULT_CACHE_ALIAS)]
+
+
+def is_shared(alias=None):
+    '''Видят ли записи кеша alias (по умолчанию TAGGED_CACHE) все воркеры.'''
+    alias = alias or getattr(settings, 'TAGGED_CACHE', DEFAULT_CACHE_ALIAS)
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_BACKENDS
+
+
+def _tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def _entry_key(key):
+    return f'{KEY_PREFIX}:entry:{key}'
+
+
+def _new_version():
+    # Не 1: вытесненный из кеша тег не должен вернуться к старой
+    # версии и оживить записи, сохранённые при ней.
+    return time.time_ns()
+
+
+def versions(tags):
+    '''Текущие версии тегов; отсутствующие создаются.'''
+    cache = get_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def set(key, value, tags=(), timeout=DEFAULT_TIMEOUT):
+    '''Сохраняет value с тегами; запись живёт, пока версии тегов те же.'''
+    tags = {ALL, *tags}
+    get_cache().set(
+        _entry_key(key), (versions(tags), value), timeout=timeout,
+    )
+
+
+def get(key, default=None):
+    cache = get_cache()
+    entry = cache.get(_entry_key(key))
+    if entry is None:
+        metrics.incr('tagged_cache', result='miss')
+        return default
+    stored, value = entry
+    current = cache.get_many([_tag_key(tag) for tag in stored])
+    if any(
+        current.get(_tag_key(tag)) != version
+        for tag, version in stored.items()
+    ):
+        metrics.incr('tagged_cache', result='stale')
+        return default
+    metrics.incr('tagged_cache', result='hit')
+    return value
+
+
+def get_or_set(key, func, tags=(), timeout=DEFAULT_TIMEOUT):
+    '''Значение из кеша или func(), сохранённое с тегами.
+
+    Версии тегов читаются до вызова func: запись, вычисленная во время
+    инвалидации, сохранится уже устаревшей и не будет выдана.
+    '''
+    sentinel = object()
+    value = get(key, sentinel)
+    if value is not sentinel:
+        return value
+    tags = {ALL, *tags}
+    stored = versions(tags)
+    value = func()
+    get_cache().set(_entry_key(key), (stored, value), timeout=timeout)
+    return value
+
+
+def delete(key):
+    get_cache().delete(_entry_key(key))
+
+
+def invalidate(*tags):
+    '''Сбрасывает все записи с любым из tags: O(1) на тег.'''
+    cache = get_cache()
+    for tag in tags:
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+        metrics.incr('tagged_cache_invalidations')
@@ -0,0 +1,152 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.dispatch import Signal
+
+from core import metrics
+from core.retry import retry_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 10.0,
+    'FLUSH_SIZE': 1000,
+}
+
+# Отправляется после записи приращений: sender — CounterBuffer, deltas —
+# {pk: приращение}.
+flushed = Signal()
+
+# Старые сборки SQLite принимают не больше 999 параметров на запрос.
+UPDATE_BATCH = 900
+
+_buffers = []
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'VIEW_COUNTERS', {})}
+
+
+class CounterBuffer:
+    '''Счётчики в памяти процесса со сбросом пачкой в столбец модели.
+
+    incr() только меняет словарь под блокировкой и никогда не пишет в
+    БД сам. Накопленные приращения уходят в БД одной транзакцией из
+    фонового потока раз в FLUSH_INTERVAL секунд или раньше, когда
+    набралось FLUSH_SIZE; при падении процесса теряется не больше одного
+    такого окна. С FLUSH_INTERVAL = None потока нет, сброс — только
+    flush() и flush_all() при выходе.
+    '''
+
+    def __init__(self, name, model, field):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.size = 0
+        self.thread = None
+        self.stopped = threading.Event()
+        self.wake = threading.Event()
+        _buffers.append(self)
+
+    def incr(self, pk, amount=1):
+        with self.lock:
+            self.pending[pk] += amount
+            self.size += amount
+            options = config()
+            if self.thread is None and options['FLUSH_INTERVAL']:
+                self.start()
+            if self.size >= options['FLUSH_SIZE']:
+                self.wake.set()
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name=f'counter-flush-{self.name}', daemon=True,
+        )
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wake.wait(config()['FLUSH_INTERVAL'])
+            self.wake.clear()
+            if self.stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Сброс счётчиков %s не удался', self.name)
+            finally:
+                close_old_connections()
+        connection.close()
+
+    def take(self):
+        with self.lock:
+            deltas, self.pending, self.size = self.pending, Counter(), 0
+        return deltas
+
+    def flush(self):
+        '''Записывает накопленные приращения; возвращает число строк.'''
+        deltas = self.take()
+        if not deltas:
+            return 0
+        started = time.perf_counter()
+        try:
+            updated = self.update(deltas)
+        except Exception:
+            # Вернуть приращения: их запишет следующий сброс.
+            with self.lock:
+                self.pending.update(deltas)
+                self.size += sum(deltas.values())
+            raise
+        metrics.observe(
+            'counter_flush_ms', (time.perf_counter() - started) * 1000,
+            counter=self.name,
+        )
+        metrics.incr('counter_flush_rows', updated, counter=self.name)
+        for receiver, error in flushed.send_robust(sender=self, deltas=deltas):
+            if isinstance(error, Exception):
+                logger.error('%s: ошибка обработчика сброса %s: %r',
+                             self.name, receiver, error)
+        return updated
+
+    def update(self, deltas):
+        # Строки с одинаковым приращением — одним UPDATE ... WHERE pk IN:
+        # за окно сброса различных приращений мало.
+        groups = defaultdict(list)
+        for pk, delta in deltas.items():
+            groups[delta].append(pk)
+
+        @retry_write(name=f'counters.{self.name}')
+        def write():
+            updated = 0
+            manager = self.model._base_manager
+            for delta, pks in groups.items():
+                for start in range(0, len(pks), UPDATE_BATCH):
+                    updated += manager.filter(
+                        pk__in=pks[start:start + UPDATE_BATCH]
+                    ).update(**{self.field: F(self.field) + delta})
+            return updated
+        return write()
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+
+
+def flush_all():
+    for buffer in _buffers:
+        try:
+            buffer.flush()
+        except Exception:
+            logger.exception('Сброс счётчиков %s не удался', buffer.name)
+
+
+# Штатная остановка воркера не теряет накопленное.
+atexit.register(flush_all)
@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from core import metrics
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    '''Общий пул потоков для ORM асинхронных представлений.
+
+    Размер ограничен ASYNC_READ_WORKERS: столько соединений с БД
+    одновременно держат асинхронные запросы.
+    '''
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.ASYNC_READ_WORKERS, thread_name_prefix='orm',
+            )
+        return _executor
+
+
+def shutdown():
+    '''Останавливает пул; следующий вызов run() создаст новый.'''
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _call(submitted, func, args, kwargs):
+    metrics.observe(
+        'executor_wait_ms', (time.perf_counter() - submitted) * 1000
+    )
+    # Как request_started/request_finished для потока пула.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(func, *args, **kwargs):
+    '''Выполняет func в пуле с contextvars вызывающей корутины.'''
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(
+        context.run, _call, time.perf_counter(), func, args, kwargs,
+    ))
@@ -0,0 +1,99 @@
+import re
+import threading
+from collections import defaultdict
+from itertools import groupby
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+# Ключ -> [количество, сумма, максимум].
+_summaries = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _sanitize(name):
+    return re.sub(r'[^a-zA-Z0-9_:]', '_', name)
+
+
+def _format(key, sanitize=False):
+    name, labels = key
+    if sanitize:
+        name = _sanitize(name)
+    if not labels:
+        return name
+    pairs = ','.join(
+        '{}="{}"'.format(label, str(value).replace('"', '\\"'))
+        for label, value in labels
+    )
+    return f'{name}{{{pairs}}}'
+
+
+def incr(name, value=1, **labels):
+    '''Увеличивает счётчик процесса.'''
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name, value, **labels):
+    '''Добавляет замер в сводку: количество, сумма и максимум.'''
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            _summaries[key] = [1, value, value]
+        else:
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = max(summary[2], value)
+
+
+def snapshot():
+    with _lock:
+        return {_format(key): value for key, value in _counters.items()}
+
+
+def summaries():
+    with _lock:
+        return {
+            _format(key): {'count': count, 'sum': total, 'max': maximum}
+            for key, (count, total, maximum) in _summaries.items()
+        }
+
+
+def render_prometheus():
+    '''Метрики процесса в текстовом формате Prometheus.
+
+    Счётчики имеют тип counter. Сводка — summary из name_count и
+    name_sum и отдельный gauge name_max. Строки одного имени идут подряд
+    после своей строки # TYPE.
+    '''
+    with _lock:
+        counters = sorted(_counters.items())
+        summaries = sorted(
+            (key, list(values)) for key, values in _summaries.items()
+        )
+    lines = []
+    for name, group in groupby(counters, key=lambda item: item[0][0]):
+        lines.append(f'# TYPE {_sanitize(name)} counter')
+        for key, value in group:
+            lines.append(f'{_format(key, sanitize=True)} {value:g}')
+    for name, group in groupby(summaries, key=lambda item: item[0][0]):
+        group = list(group)
+        lines.append(f'# TYPE {_sanitize(name)} summary')
+        for (_, labels), (count, total, _) in group:
+            for suffix, value in (('count', count), ('sum', total)):
+                metric = _format((f'{name}_{suffix}', labels), sanitize=True)
+                lines.append(f'{metric} {value:g}')
+        lines.append(f'# TYPE {_sanitize(name)}_max gauge')
+        for (_, labels), (_, _, maximum) in group:
+            metric = _format((f'{name}_max', labels), sanitize=True)
+            lines.append(f'{metric} {maximum:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
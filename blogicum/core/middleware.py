@@ -0,0 +1,78 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core.routers import pinned_to_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class AsyncCapableMiddleware:
+    '''Основа middleware, работающего и под WSGI, и под ASGI.
+
+    Под ASGI Django передаёт корутину get_response, и вызов идёт
+    через acall() без перехода в поток; под WSGI — через call().
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Стек ASGI ждёт от экземпляра корутинную функцию.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.acall(request)
+        return self.call(request)
+
+    def call(self, request):
+        return self.get_response(request)
+
+    async def acall(self, request):
+        return await self.get_response(request)
+
+
+class PrimaryPinMiddleware(AsyncCapableMiddleware):
+    '''Read-your-writes: после записи чтения идут на основную БД.
+
+    Небезопасный запрос ставит cookie на READ_YOUR_WRITES_WINDOW
+    секунд; пока она есть, запросы этого клиента не читают с реплики.
+    '''
+
+    def pinned(self, request):
+        cookie = settings.READ_YOUR_WRITES_COOKIE
+        writes = request.method not in SAFE_METHODS
+        return pinned_to_primary(writes or cookie in request.COOKIES)
+
+    def set_cookie(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.READ_YOUR_WRITES_COOKIE, '1',
+                max_age=settings.READ_YOUR_WRITES_WINDOW,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def call(self, request):
+        with self.pinned(request):
+            response = self.get_response(request)
+        return self.set_cookie(request, response)
+
+    async def acall(self, request):
+        with self.pinned(request):
+            response = await self.get_response(request)
+        return self.set_cookie(request, response)
+
+
+class AsyncURLConfMiddleware(AsyncCapableMiddleware):
+    '''Под ASGI разрешает адреса по ASYNC_ROOT_URLCONF.
+
+    Там страницы чтения заменены асинхронными представлениями
+    (blog.async_views); под WSGI используется ROOT_URLCONF.
+    '''
+
+    async def acall(self, request):
+        request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return await self.get_response(request)
@@ -0,0 +1,135 @@
+import asyncio
+import queue
+import threading
+from collections import defaultdict
+
+from core import metrics
+
+
+class Subscription:
+    '''Подписка на канал с очередью ограниченного размера.
+
+    Если подписчик не успевает читать и очередь заполнена, подписка
+    помечается переполненной и сообщения для неё отбрасываются:
+    поток закрывается, клиент переподключается и догоняет пропущенное
+    сам (для SSE — по Last-Event-ID).
+    '''
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.overflowed = False
+        self.closed = False
+        self.queue = queue.Queue(maxsize)
+
+    def deliver(self, message):
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+            return False
+        return True
+
+    def get(self, timeout):
+        '''Следующее сообщение или None, если за timeout секунд его нет.'''
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+        self.broker.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    '''Подписка для корутин: сообщения передаются в цикл событий.'''
+
+    def __init__(self, broker, channel, maxsize):
+        super().__init__(broker, channel, maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        if self.overflowed:
+            return False
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Цикл событий уже закрыт.
+            self.overflowed = True
+            return False
+        return True
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            metrics.incr('pubsub_overflow')
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        super().close()
+        # Будим get(), если корутина ещё ждёт сообщения.
+        self.loop.call_soon_threadsafe(self._put, None)
+
+
+class Broker:
+    '''Pub/sub внутри процесса: сообщения получают подписчики этого
+    процесса, другие воркеры их не видят.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+        self.total = 0
+
+    def subscribe(self, channel, maxsize, limit=None,
+                  subscription_class=Subscription):
+        '''Новая подписка или None, если подписок уже limit.'''
+        with self.lock:
+            if limit is not None and self.total >= limit:
+                metrics.incr('pubsub_rejected')
+                return None
+            subscription = subscription_class(self, channel, maxsize)
+            self.channels[channel].add(subscription)
+            self.total += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.channels.get(subscription.channel, set())
+            if subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            self.total -= 1
+            if not subscriptions:
+                del self.channels[subscription.channel]
+
+    def has_subscribers(self, channel):
+        with self.lock:
+            return bool(self.channels.get(channel))
+
+    def publish(self, channel, message):
+        '''Рассылает message подписчикам канала, возвращает их число.'''
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        delivered = 0
+        for subscription in subscriptions:
+            if subscription.deliver(message):
+                delivered += 1
+            else:
+                metrics.incr('pubsub_overflow')
+        metrics.incr('pubsub_published')
+        return delivered
+
+
+broker = Broker()
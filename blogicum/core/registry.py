@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import router
+
+from core import metrics
+from core.cache import get_cache
+from core.middleware import AsyncCapableMiddleware
+
+MISSING = 'registry:missing'
+KEY_PREFIX = 'registry'
+
+_registries = []
+_refreshed = ContextVar('registry_refreshed', default=False)
+
+
+class Registry:
+    '''Read-through справочник: LRU процесса перед общим кешем Django.
+
+    Записи общего кеша лежат под версией stamp. invalidate() меняет
+    её одним вызовом, остальные воркеры видят новую версию при
+    следующей сверке и очищают свой LRU. Внутри запроса сверка одна
+    (RegistryMiddleware), вне запроса — при каждом обращении. Версия
+    общая для воркеров только при общем бэкенде кеша (core.cache.
+    is_shared); с LocMemCache каждый процесс видит лишь свои сбросы.
+    '''
+
+    def __init__(self, name, model, fields=('pk',), maxsize=1024,
+                 timeout=None):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+        self.stamp = None
+        _registries.append(self)
+
+    @property
+    def stamp_key(self):
+        return f'{KEY_PREFIX}:{self.name}:stamp'
+
+    def sync(self, stamp):
+        '''Принимает версию из общего кеша; при смене очищает LRU.'''
+        with self.lock:
+            if stamp != self.stamp:
+                self.local.clear()
+                self.stamp = stamp
+
+    def refresh(self):
+        cache = get_cache()
+        stamp = cache.get(self.stamp_key)
+        if stamp is None:
+            cache.add(self.stamp_key, time.time_ns(), timeout=None)
+            stamp = cache.get(self.stamp_key)
+        self.sync(stamp)
+
+    def invalidate(self):
+        cache = get_cache()
+        try:
+            stamp = cache.incr(self.stamp_key)
+        except ValueError:
+            stamp = time.time_ns()
+            cache.set(self.stamp_key, stamp, timeout=None)
+        self.sync(stamp)
+
+    def get(self, **lookup):
+        '''Объект по одному полю из fields или None.'''
+        (field, value), = lookup.items()
+        if field not in self.fields:
+            raise ValueError(f'{self.name}: поиск по {field} не кешируется')
+        if not _refreshed.get():
+            self.refresh()
+        key = (field, value)
+        with self.lock:
+            stamp = self.stamp
+            if key in self.local:
+                self.local.move_to_end(key)
+                metrics.incr('registry', registry=self.name, tier='local')
+                obj = self.local[key]
+                return None if obj == MISSING else obj
+        shared_key = f'{KEY_PREFIX}:{self.name}:{stamp}:{field}:{value}'
+        cache = get_cache()
+        obj = cache.get(shared_key)
+        if obj is None:
+            metrics.incr('registry', registry=self.name, tier='db')
+            # Запись живёт без срока: отстающая реплика (replica_reads)
+            # закрепила бы в ней устаревшую строку, поэтому читаем основную.
+            obj = self.model._default_manager.using(
+                router.db_for_write(self.model)
+            ).filter(**{field: value}).first() or MISSING
+            cache.set(shared_key, obj, timeout=self.timeout)
+        else:
+            metrics.incr('registry', registry=self.name, tier='shared')
+        with self.lock:
+            if stamp == self.stamp:
+                self.local[key] = obj
+                self.local.move_to_end(key)
+                while len(self.local) > self.maxsize:
+                    self.local.popitem(last=False)
+        return None if obj == MISSING else obj
+
+
+def refresh_all():
+    '''Сверяет версии всех справочников одним get_many.'''
+    registries = {registry.stamp_key: registry for registry in _registries}
+    stamps = get_cache().get_many(registries)
+    for key, registry in registries.items():
+        if key in stamps:
+            registry.sync(stamps[key])
+        else:
+            registry.refresh()
+
+
+@contextmanager
+def request_scope():
+    refresh_all()
+    token = _refreshed.set(True)
+    try:
+        yield
+    finally:
+        _refreshed.reset(token)
+
+
+class RegistryMiddleware(AsyncCapableMiddleware):
+    '''Одна сверка версий справочников на запрос.'''
+
+    def call(self, request):
+        with request_scope():
+            return self.get_response(request)
+
+    async def acall(self, request):
+        with request_scope():
+            return await self.get_response(request)
@@ -0,0 +1,75 @@
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+
+from core import metrics
+
+RETRYABLE_ERRORS = (
+    'database is locked',
+    'database table is locked',
+    'database is busy',
+    'could not serialize access',
+    'deadlock detected',
+)
+
+DEFAULT_POLICY = {
+    'ATTEMPTS': 5,
+    'BASE_DELAY': 0.05,
+    'MAX_DELAY': 1.0,
+    'DEADLINE': 5.0,
+}
+
+
+def is_retryable(exc):
+    message = str(exc).lower()
+    return any(error in message for error in RETRYABLE_ERRORS)
+
+
+def _policy():
+    return {**DEFAULT_POLICY, **getattr(settings, 'WRITE_RETRY', {})}
+
+
+def retry_write(func=None, *, using=DEFAULT_DB_ALIAS, name=None):
+    '''Выполняет func в транзакции, повторяя при блокировке БД.
+
+    Пауза между попытками растёт экспоненциально со случайным
+    разбросом (full jitter) и ограничена общим дедлайном. Внутри
+    уже открытой транзакции повтор бессмыслен, поэтому там func
+    вызывается как есть.
+    '''
+    if func is None:
+        return functools.partial(retry_write, using=using, name=name)
+    metric = f'write_retry.{name or func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connections[using].in_atomic_block:
+            return func(*args, **kwargs)
+        policy = _policy()
+        deadline = time.monotonic() + policy['DEADLINE']
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                delay = random.uniform(0, min(
+                    policy['MAX_DELAY'],
+                    policy['BASE_DELAY'] * 2 ** (attempt - 1),
+                ))
+                if (
+                    not is_retryable(exc)
+                    or attempt >= policy['ATTEMPTS']
+                    or time.monotonic() + delay > deadline
+                ):
+                    metrics.incr(f'{metric}.failed')
+                    raise
+                metrics.incr(f'{metric}.retries')
+                time.sleep(delay)
+
+    return wrapper
@@ -0,0 +1,61 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def get_replicas():
+    return [
+        alias for alias in getattr(settings, 'DATABASE_REPLICAS', ())
+        if alias in settings.DATABASES
+    ]
+
+
+@contextmanager
+def replica_reads():
+    '''Разрешает чтение с реплики внутри блока.'''
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def pinned_to_primary(pinned=True):
+    '''Внутри блока все чтения идут на основную БД.'''
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    '''Запись — в основную БД, чтение в replica_reads() — на реплику.
+
+    Реплика используется только для моделей из REPLICA_APPS и только
+    если запрос не закреплён за основной БД после записи.
+    '''
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _pinned.get():
+            return None
+        if model._meta.app_label not in settings.REPLICA_APPS:
+            return None
+        replicas = get_replicas()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
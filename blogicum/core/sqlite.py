@@ -0,0 +1,81 @@
+import os
+
+from django.conf import settings
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+# Значение PRAGMA auto_vacuum для режима INCREMENTAL.
+INCREMENTAL = 2
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    '''Применяет профиль SQLITE_PRAGMAS к новому соединению.'''
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value};')
+
+
+def _pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name};')
+    return cursor.fetchone()[0]
+
+
+def checkpoint(connection, mode='PASSIVE'):
+    '''Переносит WAL в основной файл базы.
+
+    Возвращает кортеж (busy, log, checkpointed) из wal_checkpoint.
+    '''
+    mode = mode.upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f'Неизвестный режим checkpoint: {mode}')
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode});')
+        return cursor.fetchone()
+
+
+def analyze(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE;')
+        cursor.execute('PRAGMA optimize;')
+
+
+def enable_incremental_vacuum(connection):
+    '''Переводит базу в auto_vacuum = INCREMENTAL.
+
+    Для существующей базы это полный VACUUM: файл переписывается целиком
+    под эксклюзивной блокировкой.
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL;')
+        cursor.execute('VACUUM;')
+
+
+def incremental_vacuum(connection, pages=0):
+    '''Освобождает страницы из freelist; 0 — все свободные страницы.'''
+    with connection.cursor() as cursor:
+        if _pragma(cursor, 'auto_vacuum') != INCREMENTAL:
+            raise ValueError(
+                'auto_vacuum базы не INCREMENTAL: сначала '
+                'enable_incremental_vacuum().'
+            )
+        cursor.execute(f'PRAGMA incremental_vacuum({int(pages)});')
+
+
+def health(connection):
+    '''Сводка состояния файла базы: WAL и статистика страниц.'''
+    with connection.cursor() as cursor:
+        stats = {
+            name: _pragma(cursor, name)
+            for name in (
+                'journal_mode', 'synchronous', 'busy_timeout',
+                'page_size', 'page_count', 'freelist_count', 'auto_vacuum',
+            )
+        }
+    name = str(connection.settings_dict['NAME'])
+    wal_path = f'{name}-wal'
+    stats['db_size'] = stats['page_size'] * stats['page_count']
+    stats['wal_size'] = (
+        os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+    )
+    return stats
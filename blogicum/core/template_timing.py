@@ -0,0 +1,159 @@
+import logging
+import random
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template import base, library
+from django.template.loaders import base as base_loader, cached
+
+from core import metrics
+from core.middleware import AsyncCapableMiddleware
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SAMPLE_RATE': 1.0,
+    'LOG_THRESHOLD_MS': 0,
+    'LOG_TOP': 5,
+}
+
+_collector = ContextVar('template_timing', default=None)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'TEMPLATE_TIMING', {})}
+
+
+class Collector:
+    '''Время рендеринга шаблонов одного запроса.
+
+    Для каждого имени хранит число рендеров, полное время и
+    собственное время без вложенных шаблонов и тегов.
+    '''
+
+    def __init__(self):
+        self.timings = defaultdict(lambda: [0, 0.0, 0.0])
+        self.stack = []
+
+    def measure(self, name, render, *args):
+        self.stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return render(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            timing = self.timings[name]
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] += elapsed - nested
+
+
+def _timed(render, name):
+    def wrapper(context):
+        collector = _collector.get()
+        if collector is None:
+            return render(context)
+        return collector.measure(name, render, context)
+    wrapper.__wrapped__ = render
+    return wrapper
+
+
+class TimedTemplate(base.Template):
+    '''Шаблон с замером рендеринга своего и пользовательских тегов.
+
+    _render вызывается и для шаблона страницы, и для каждого
+    {% include %} и {% extends %}. Теги SimpleNode и InclusionNode
+    (библиотеки вроде django_bootstrap5) оборачиваются в узлах этого
+    шаблона, классы Django не меняются.
+    '''
+
+    def compile_nodelist(self):
+        nodelist = super().compile_nodelist()
+        for node in nodelist.get_nodes_by_type(
+            (library.SimpleNode, library.InclusionNode)
+        ):
+            node.render = _timed(node.render, f'tag:{node.func.__name__}')
+        return nodelist
+
+    def _render(self, context):
+        collector = _collector.get()
+        if collector is None:
+            return super()._render(context)
+        name = self.origin.template_name or self.name or '<string>'
+        return collector.measure(name, super()._render, context)
+
+
+class TimedLoader(base_loader.Loader):
+
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        # Базовый загрузчик создаёт Template; шаблон компилируется
+        # повторно один раз, дальше его хранит cached.Loader.
+        return TimedTemplate(
+            template.source, template.origin, template.name, self.engine
+        )
+
+
+class Loader(cached.Loader, TimedLoader):
+    '''cached.Loader, который загружает шаблоны как TimedTemplate.'''
+
+
+class TemplateTimingMiddleware(AsyncCapableMiddleware):
+    '''Замеряет рендеринг шаблонов у доли запросов SAMPLE_RATE.
+
+    Замеряются шаблоны, загруженные core.template_timing.Loader.
+    '''
+
+    def call(self, request):
+        options = config()
+        if random.random() >= options['SAMPLE_RATE']:
+            return self.get_response(request)
+        collector = Collector()
+        token = _collector.set(collector)
+        try:
+            return self.get_response(request)
+        finally:
+            _collector.reset(token)
+            self.report(request, collector, options)
+
+    async def acall(self, request):
+        options = config()
+        if random.random() >= options['SAMPLE_RATE']:
+            return await self.get_response(request)
+        collector = Collector()
+        token = _collector.set(collector)
+        try:
+            return await self.get_response(request)
+        finally:
+            _collector.reset(token)
+            self.report(request, collector, options)
+
+    def report(self, request, collector, options):
+        total = 0.0
+        for name, (count, inclusive, exclusive) in collector.timings.items():
+            metrics.observe('template_render_ms', inclusive * 1000,
+                            template=name)
+            metrics.observe('template_self_ms', exclusive * 1000,
+                            template=name)
+            metrics.incr('template_renders', count, template=name)
+            total += exclusive
+        total_ms = total * 1000
+        metrics.observe('template_request_ms', total_ms)
+        if not collector.timings or total_ms < options['LOG_THRESHOLD_MS']:
+            return
+        top = sorted(
+            collector.timings.items(), key=lambda item: item[1][2],
+            reverse=True,
+        )[:options['LOG_TOP']]
+        logger.info(
+            'templates %s %s: %.1fms; %s', request.method, request.path,
+            total_ms, ', '.join(
+                f'{name} x{count} {exclusive * 1000:.1f}ms'
+                for name, (count, _, exclusive) in top
+            ),
+        )
@@ -1,6 +1,11 @@
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
 from django.template import RequestContext
 
+from core import metrics, sqlite
+
 
 def e_handler500(request):
     context = RequestContext(request)
@@ -15,3 +20,28 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'pages/403csrf.html', status=403)
+
+
+def is_internal(request):
+    '''Служебные страницы: персоналу и адресам из INTERNAL_IPS.'''
+    return (
+        request.user.is_staff
+        or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    )
+
+
+def db_health(request):
+    if not is_internal(request):
+        return HttpResponseForbidden()
+    if connection.vendor != 'sqlite':
+        return JsonResponse({'vendor': connection.vendor})
+    return JsonResponse(sqlite.health(connection))
+
+
+def metrics_view(request):
+    if not is_internal(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -32,6 +32,26 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Откат транзакции теста не отправляет сигналы моделей, поэтому
+    # кеш и справочники (blog.registry) сбрасываются между тестами.
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def view_counters():
+    # Без фонового потока сброса: он писал бы в БД после отката теста.
+    from core import counters
+    with override_settings(VIEW_COUNTERS={'FLUSH_INTERVAL': None}):
+        yield
+    for buffer in counters._buffers:
+        buffer.take()
+
+
 class SafeImportFromContextManager:
 
     def __init__(self, import_path: str,
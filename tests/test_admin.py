@@ -0,0 +1,45 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+CHANGELIST_URL = '/admin/blog/comment/'
+
+
+def _changelist_queries(admin_client) -> int:
+    with CaptureQueriesContext(connection) as ctx:
+        response = admin_client.get(CHANGELIST_URL)
+    assert response.status_code == 200, (
+        'Убедитесь, что страница списка комментариев в админке '
+        'открывается без ошибок.'
+    )
+    return len(ctx.captured_queries)
+
+
+def test_comment_changelist_query_count(
+        admin_client, mixer, post_with_published_location):
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    n_queries_one = _changelist_queries(admin_client)
+    mixer.cycle(20).blend('blog.Comment', post=mixer.SELECT)
+    n_queries_many = _changelist_queries(admin_client)
+    assert n_queries_one == n_queries_many, (
+        'Убедитесь, что число запросов к БД на странице списка '
+        'комментариев в админке не зависит от количества комментариев.'
+    )
+
+
+def test_export_action_streams_selected_rows(
+        admin_client, post_with_published_location):
+    response = admin_client.post('/admin/blog/post/', {
+        'action': 'export_jsonl',
+        '_selected_action': [post_with_published_location.pk],
+    })
+    assert response.streaming, (
+        'Убедитесь, что выгрузка из админки отдаётся потоковым ответом.'
+    )
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert len(lines) == 1
+    assert str(post_with_published_location.pk) in lines[0]
@@ -0,0 +1,134 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def _pages(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        ids += [item['id'] for item in data['results']]
+        url = data['next']
+    return ids
+
+
+def test_feed_cursor_pagination(
+        client: Client, many_posts_with_published_locations,
+        posts_with_unpublished_category, future_posts):
+    expected = [
+        post.pk for post in sorted(
+            many_posts_with_published_locations,
+            key=lambda post: (post.pub_date, post.pk), reverse=True)
+    ]
+    assert _pages(client, '/api/posts/?limit=7&fields=id') == expected, (
+        'Курсор должен обойти все опубликованные посты без повторов '
+        'и пропусков, от новых к старым.'
+    )
+    assert client.get('/api/posts/?cursor=broken').status_code == 400
+    category = many_posts_with_published_locations[0].category
+    assert len(_pages(
+        client, f'/api/categories/{category.slug}/posts/')) == len(expected)
+
+
+def test_author_sees_own_posts(
+        user_client: Client, another_user_client: Client, user,
+        posts_with_unpublished_category, future_posts):
+    url = f'/api/users/{user.username}/posts/'
+    assert len(_pages(user_client, url)) == 6
+    assert _pages(another_user_client, url) == []
+    post = future_posts[0]
+    assert user_client.get(f'/api/posts/{post.pk}/').status_code == 200
+    for path in ('', 'comments/'):
+        response = another_user_client.get(f'/api/posts/{post.pk}/{path}')
+        assert response.status_code == 404
+        assert 'detail' in response.json()
+
+
+def test_sparse_fields(client: Client, post_with_published_location):
+    post = post_with_published_location
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/api/posts/?fields=id,title')
+    assert response.json()['results'] == [{'id': post.pk, 'title': post.title}]
+    sql = ' '.join(query['sql'] for query in context.captured_queries)
+    assert '"text"' not in sql and 'JOIN "auth_user"' not in sql, (
+        'Запрос ленты должен выбирать только столбцы запрошенных полей.'
+    )
+    data = client.get(
+        f'/api/posts/{post.pk}/?fields=author,category,location,comment_count'
+    ).json()
+    assert data == {
+        'author': post.author.username,
+        'category': post.category.slug,
+        'location': post.location.name,
+        'comment_count': 0,
+    }
+    assert client.get('/api/posts/?fields=id,secret').status_code == 400
+
+
+def test_etag_and_invalidation(
+        client: Client, mixer, post_with_published_location):
+    post = post_with_published_location
+    url = f'/api/posts/{post.pk}/comments/'
+    response = client.get(url)
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not context.captured_queries, (
+        'Ответ 304 на совпавший ETag не должен обращаться к БД.'
+    )
+    comment = mixer.blend('blog.Comment', post=post)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['results'][0]['text'] == comment.text
+
+
+def test_cache_key_from_parsed_params(
+        client: Client, many_posts_with_published_locations):
+    data = client.get('/api/posts/?fields=id&limit=7').json()
+    with CaptureQueriesContext(connection) as context:
+        same = client.get('/api/posts/?limit=07&utm=x&fields=id').json()
+    assert same == data and not context.captured_queries, (
+        'Ключ кеша API должен строиться из разобранных параметров.'
+    )
+    assert 'utm' not in data['next']
+    etag = client.get('/api/posts/').headers['ETag']
+    for header, status in (
+        (f'W/"other", {etag}', 304),
+        (etag[:-3] + '"', 200),
+    ):
+        response = client.get('/api/posts/', HTTP_IF_NONE_MATCH=header)
+        assert response.status_code == status
+
+
+def test_comments_follow_post_visibility(
+        client: Client, post_with_published_location):
+    post = post_with_published_location
+    url = f'/api/posts/{post.pk}/comments/'
+    assert client.get(url).status_code == 200
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(url).status_code == 404, (
+        'Кеш комментариев должен сбрасываться вместе с постом.'
+    )
+
+
+def test_comments_follow_commenter_rename(
+        client: Client, mixer, post_with_published_location):
+    post = post_with_published_location
+    commenter = mixer.blend('auth.User', username='commenter1')
+    mixer.blend('blog.Comment', post=post, author=commenter)
+    url = f'/api/posts/{post.pk}/comments/?fields=author'
+    assert client.get(url).json()['results'] == [{'author': 'commenter1'}]
+    commenter.username = 'commenter2'
+    commenter.save()
+    assert client.get(url).json()['results'] == [{'author': 'commenter2'}], (
+        'Кеш комментариев должен сбрасываться при изменении их авторов.'
+    )
@@ -0,0 +1,73 @@
+import json
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient, Client
+
+from blogicum import settings_asgi
+from core import executor, metrics
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True)
+]
+
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]+"')
+# Поток комментариев подключается только на страницах из-под ASGI.
+STREAM_SCRIPT = re.compile(rb'\s*<script>.*?EventSource.*?</script>', re.S)
+
+
+@pytest.fixture
+def async_stack(settings):
+    # Тестовая БД SQLite в памяти с общим кешем блокирует таблицы и для
+    # читателей, поэтому пул ORM из одного потока.
+    settings.MIDDLEWARE = settings_asgi.MIDDLEWARE
+    settings.ASYNC_READ_WORKERS = 1
+    executor.shutdown()
+    yield
+    executor.shutdown()
+
+
+@pytest.mark.parametrize('url_template', [
+    '/',
+    '/category/{post.category.slug}/',
+    '/profile/{post.author.username}/',
+    '/posts/{post.id}/',
+])
+def test_async_views_match_sync(
+        async_stack, url_template, many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    url = url_template.format(post=post)
+    sync_response = Client().get(url)
+    waits = metrics.summaries().get('executor_wait_ms', {}).get('count', 0)
+    async_response = async_to_sync(AsyncClient().get)(url)
+    assert async_response.status_code == sync_response.status_code == 200
+    assert metrics.summaries()['executor_wait_ms']['count'] == waits + 1, (
+        'Убедитесь, что под ASGI страница обслуживается асинхронным '
+        'представлением через пул core.executor.'
+    )
+    assert CSRF_TOKEN.sub(b'', STREAM_SCRIPT.sub(
+        b'', async_response.content
+    )) == CSRF_TOKEN.sub(b'', sync_response.content)
+    assert (b'EventSource' in async_response.content) == (
+        url_template == '/posts/{post.id}/'
+    )
+
+
+def test_async_streaming_page(
+        async_stack, settings, many_posts_with_published_locations):
+    settings.STREAMING_VIEWS = ('index',)
+    response = async_to_sync(AsyncClient().get)('/')
+    assert response.status_code == 200
+    assert b'<article' in b''.join(response.streaming_content)
+
+
+def test_bench_asgi_report(tmp_path, async_stack, post_with_published_location):
+    output = tmp_path / 'asgi.json'
+    call_command('bench_asgi', duration=0.3, concurrency=4, workers=1,
+                 client_delay=1, output=str(output))
+    report = json.loads(output.read_text())
+    for mode in ('wsgi', 'asgi'):
+        assert report[mode]['requests'] > 0
+        assert set(report[mode]['statuses']) == {'200'}
@@ -0,0 +1,77 @@
+import pytest
+from django.test import Client
+
+from blog import checks
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+URL = '/pages/about/'
+
+
+@pytest.fixture(autouse=True)
+def cached_auth(settings):
+    # Включается до входа: сессия запоминает бэкенд и движок.
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTHENTICATION_BACKENDS = [checks.CACHED_BACKEND]
+
+
+def test_requires_shared_cache(settings):
+    assert [error.id for error in checks.cached_auth(None)] == [
+        'blog.E001', 'blog.E002'
+    ]
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': '127.0.0.1:11211',
+    }}
+    assert checks.cached_auth(None) == []
+
+
+def test_logged_in_request_without_queries(
+        user_client: Client, django_assert_num_queries):
+    user_client.get(URL)
+    with django_assert_num_queries(0):
+        response = user_client.get(URL)
+    assert response.context['user'].is_authenticated, (
+        'Сессия и пользователь должны читаться из кеша без запросов к БД.'
+    )
+
+
+def test_profile_update_refreshes_cached_user(user, user_client: Client):
+    user_client.get(URL)
+    response = user_client.post('/edit_profile/', {
+        'username': user.username,
+        'first_name': 'Новое',
+        'last_name': 'Имя',
+        'email': 'new@example.com',
+    })
+    assert response.status_code == 302
+    assert user_client.get(URL).context['user'].first_name == 'Новое'
+
+
+def test_password_change_logs_out_other_sessions(user, client: Client):
+    user.set_password('old-password-1')
+    user.save()
+    first, second = Client(), Client()
+    for session in (first, second):
+        assert session.login(username=user.username,
+                             password='old-password-1')
+        session.get(URL)
+    response = first.post('/auth/password_change/', {
+        'old_password': 'old-password-1',
+        'new_password1': 'new-Password-2',
+        'new_password2': 'new-Password-2',
+    })
+    assert response.status_code == 302
+    assert first.get(URL).context['user'].is_authenticated
+    assert not second.get(URL).context['user'].is_authenticated, (
+        'После смены пароля закешированный пользователь не должен '
+        'сохранять другие сессии.'
+    )
+
+
+def test_logout_clears_session(user_client: Client):
+    user_client.get(URL)
+    user_client.get('/auth/logout/')
+    assert not user_client.get(URL).context['user'].is_authenticated
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core import bench
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_compare_flags_regressions():
+    baseline = {'anon:index': {'p50': 10.0, 'p95': 20.0, 'queries': 3}}
+    assert bench.compare(
+        {'anon:index': {'p50': 11.0, 'p95': 21.0, 'queries': 3}},
+        baseline, threshold=0.2) == []
+    regressions = bench.compare(
+        {'anon:index': {'p50': 13.0, 'p95': 20.0, 'queries': 4}},
+        baseline, threshold=0.2)
+    assert len(regressions) == 2
+
+
+def test_bench_urls(tmp_path, post_with_published_location, comment_to_a_post):
+    output = tmp_path / 'bench.json'
+    call_command('bench_urls', repeat=1, warmup=0, output=str(output))
+    results = json.loads(output.read_text())
+    for key in ('anon:index', 'auth:post_detail', 'anon:profile?page=last'):
+        assert key in results
+        assert {'p50', 'p95', 'queries', 'sql_ms', 'bytes'} <= set(
+            results[key])
+    assert results['anon:index']['status'] == 200
+
+    slower = {key: {**row, 'queries': row['queries'] - 1}
+              for key, row in results.items()}
+    baseline = tmp_path / 'baseline.json'
+    bench.dump(slower, str(baseline))
+    with pytest.raises(CommandError):
+        call_command('bench_urls', repeat=1, warmup=0,
+                     baseline=str(baseline), routes=['index'])
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache as django_cache
+
+from blog.cache_tags import FEED, page_tags, post_tags, tag
+from core import cache
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_tagged_get_set_invalidate():
+    cache.set('a', 1, tags=['x'])
+    cache.set('b', 2, tags=['x', 'y'])
+    cache.set('c', 3, tags=['z'])
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, 2, 3)
+    cache.invalidate('y')
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    django_cache.delete('tagged:tag:x')
+    assert cache.get('a') is None, (
+        'Запись с вытесненным тегом не должна считаться актуальной.'
+    )
+    calls = []
+    for _ in range(2):
+        assert cache.get_or_set(
+            'd', lambda: calls.append(1) or 4, tags=['z']) == 4
+    assert len(calls) == 1
+    cache.invalidate(cache.ALL)
+    assert cache.get('c') is None and cache.get('d') is None
+
+
+def _cache_post(post):
+    cache.set(f'card:{post.pk}', 'card', tags=post_tags(post))
+    cache.set('feed:1', 'page', tags=page_tags([post]))
+
+
+@pytest.mark.parametrize('change', [
+    'unpublish_category', 'rename_author', 'rename_location', 'comment',
+    'edit_post',
+])
+def test_model_signals_invalidate(
+        mixer, change, post_with_published_location):
+    post = post_with_published_location
+    other = mixer.blend('blog.Post', category=None, location=None)
+    cache.set('other', 'card', tags=post_tags(other))
+    _cache_post(post)
+    if change == 'unpublish_category':
+        post.category.is_published = False
+        post.category.save()
+    elif change == 'rename_author':
+        post.author.username = 'renamed'
+        post.author.save()
+    elif change == 'rename_location':
+        post.location.name = 'Другое место'
+        post.location.save()
+    elif change == 'comment':
+        mixer.blend('blog.Comment', post=post)
+    else:
+        post.title = 'Новый заголовок'
+        post.save()
+    assert cache.get(f'card:{post.pk}') is None
+    assert cache.get('feed:1') is None
+    assert cache.get('other') == 'card', (
+        'Изменение не должно сбрасывать записи без его тегов.'
+    )
+
+
+def test_login_does_not_invalidate_user(user_client, user):
+    cache.set('profile', 'card', tags=[tag('user', user.pk)])
+    user_client.force_login(user)
+    assert cache.get('profile') == 'card'
+    cache.invalidate(FEED)
+    assert cache.get('profile') == 'card'
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+
+from blog import category_stats
+from blog.models import CategoryStats, Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def _count(category):
+    return CategoryStats.objects.get(category=category).post_count
+
+
+def test_counts_follow_post_changes(mixer, user, published_category):
+    other = mixer.blend('blog.Category', is_published=True)
+    now = timezone.now()
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=now - timedelta(days=1),
+    )
+    scheduled = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=now + timedelta(days=1),
+    )
+    assert _count(published_category) == 3, (
+        'Отложенный пост не должен входить в счётчик категории.'
+    )
+    posts[0].is_published = False
+    posts[0].save()
+    posts[1].category = other
+    posts[1].save()
+    posts[2].delete()
+    assert (_count(published_category), _count(other)) == (0, 1)
+    category_stats.catch_up(now=now + timedelta(days=2))
+    assert _count(published_category) == 1, (
+        'После даты отложенного поста счётчик должен пересчитываться.'
+    )
+    assert CategoryStats.objects.get(
+        category=published_category
+    ).next_pub_date is None
+    # Изменение в обход сигналов исправляет команда сверки.
+    Post.objects.filter(pk=scheduled.pk).update(is_published=False)
+    call_command('reconcile_category_stats', verbosity=0)
+    assert _count(published_category) == 0
+
+
+def test_sidebar_is_cached_fragment(
+        settings, client: Client, django_assert_num_queries,
+        django_capture_on_commit_callbacks, mixer,
+        many_posts_with_published_locations):
+    category = many_posts_with_published_locations[0].category
+    url = f'/category/{category.slug}/'
+    client.get('/pages/about/')
+    with django_assert_num_queries(0):
+        content = client.get('/pages/about/').content.decode()
+    assert f'href="{url}"' in content
+    assert f'>{len(many_posts_with_published_locations)}</span>' in content
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend(
+            'blog.Post', category=category, is_published=True,
+            pub_date=timezone.now(),
+        )
+    content = client.get('/pages/about/').content.decode()
+    assert f'>{len(many_posts_with_published_locations) + 1}</span>' in (
+        content
+    ), 'Фрагмент должен обновляться после изменения счётчиков.'
+    settings.JINJA2_VIEWS = ('index',)
+    jinja = client.get('/').content.decode()
+    assert content[content.index('<aside'):content.index('</aside>')] == (
+        jinja[jinja.index('<aside'):jinja.index('</aside>')]
+    )
@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import Client
+
+from blog import streams
+from core import executor
+from core.pubsub import Broker, broker
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def fast_stream(settings):
+    settings.COMMENT_STREAM = {
+        'HEARTBEAT': 0.05, 'IDLE_TIMEOUT': 0.3, 'QUEUE_SIZE': 2,
+        'MAX_CONNECTIONS': 2,
+    }
+
+
+def test_broker_backpressure():
+    local = Broker()
+    slow = local.subscribe('channel', maxsize=2)
+    fast = local.subscribe('channel', maxsize=10)
+    for n in range(3):
+        local.publish('channel', n)
+    assert slow.overflowed and not fast.overflowed, (
+        'Переполненная очередь медленного подписчика не должна мешать '
+        'остальным.'
+    )
+    assert [fast.get(0) for _ in range(3)] == [0, 1, 2]
+    assert local.subscribe('other', 1, limit=2) is None
+    slow.close()
+    fast.close()
+    assert local.total == 0 and not local.channels
+
+
+def test_comment_published_after_commit(
+        mixer, django_capture_on_commit_callbacks, post_with_published_location):
+    subscription = broker.subscribe(
+        streams.channel(post_with_published_location.pk), 4)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            comment = mixer.blend(
+                'blog.Comment', post=post_with_published_location,
+                text='Свежий комментарий')
+        comment_id, html = subscription.get(0)
+    finally:
+        subscription.close()
+    assert comment_id == comment.pk
+    assert 'Свежий комментарий' in html
+    assert f'name="comment_{comment.pk}"' in html
+
+
+def _asgi_get(path, query=b'', publish=None):
+    '''Ответ blogicum.asgi на GET: статус и тело; publish — сообщение
+    в канал path после подписки.'''
+    from blogicum.asgi import application
+
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    async def send_later(post_id):
+        while not broker.has_subscribers(streams.channel(post_id)):
+            await asyncio.sleep(0.01)
+        broker.publish(streams.channel(post_id), publish)
+
+    async def run():
+        request = application({
+            'type': 'http', 'method': 'GET', 'headers': [], 'path': path,
+            'query_string': query,
+        }, receive, send)
+        if publish is None:
+            return await request
+        await asyncio.gather(request, send_later(int(path.split('/')[2])))
+
+    async_to_sync(run)()
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:]
+    ).decode()
+
+
+@pytest.fixture
+def asgi_executor(settings):
+    settings.ASYNC_READ_WORKERS = 1
+    executor.shutdown()
+    yield
+    executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sse_stream(
+        fast_stream, asgi_executor, mixer, post_with_published_location):
+    post = post_with_published_location
+    old = mixer.blend('blog.Comment', post=post, author=post.author)
+    new = mixer.blend('blog.Comment', post=post, author=post.author)
+    status, body = _asgi_get(
+        f'/posts/{post.pk}/comments/stream/', f'after={old.pk}'.encode(),
+        publish=(new.pk + 1, '<div>live</div>'),
+    )
+    assert status == 200
+    assert f'id: {new.pk}\nevent: comment\n' in body
+    assert f'id: {old.pk}\n' not in body
+    assert 'data: <div>live</div>' in body
+    assert ': ping' in body
+    assert body.endswith('event: close\ndata: \n\n'), (
+        'Поток должен закрываться после простоя IDLE_TIMEOUT.'
+    )
+    assert broker.total == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sse_limits(fast_stream, asgi_executor, post_with_published_location):
+    url = f'/posts/{post_with_published_location.pk}/comments/stream/'
+    held = [
+        broker.subscribe(
+            streams.channel(post_with_published_location.pk), 2, 2
+        ) for _ in range(2)
+    ]
+    assert _asgi_get(url)[0] == 503
+    for subscription in held:
+        subscription.close()
+    assert _asgi_get('/posts/0/comments/stream/')[0] == 404
+    assert broker.total == 0
+
+
+def test_wsgi_page_without_stream(
+        user_client: Client, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.get(f'/posts/{post.pk}/comments/stream/')
+    assert response.status_code == 204, (
+        'Под WSGI маршрут потока не должен держать соединение.'
+    )
+    assert 'EventSource' not in user_client.get(
+        f'/posts/{post.pk}/'
+    ).content.decode()
+
+
+def test_comment_fragment_for_author(
+        mixer, user, user_client: Client, client: Client,
+        post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    url = f'/posts/{post.pk}/comments/{comment.pk}/'
+    edit = f'/posts/{post.pk}/edit_comment/{comment.pk}/'
+    assert edit in user_client.get(url).content.decode()
+    assert edit not in client.get(url).content.decode()
+    assert edit not in streams.render_comment(comment)
+    assert client.get(f'/posts/{post.pk}/comments/0/').status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.counters import post_views
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_views_are_buffered_and_flushed_in_batch(
+        client: Client, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations[:3]
+    for post in posts:
+        for _ in range(post.pk % 3 + 1):
+            with CaptureQueriesContext(connection) as context:
+                assert client.get(f'/posts/{post.pk}/').status_code == 200
+            assert not any(
+                query['sql'].startswith('UPDATE') for query in
+                context.captured_queries
+            ), 'Просмотр поста не должен сразу писать в БД.'
+    with CaptureQueriesContext(connection) as context:
+        assert post_views.flush() == 3
+    assert len([query for query in context.captured_queries
+                if query['sql'].startswith('UPDATE "blog_post"')]) == len(
+        {post.pk % 3 + 1 for post in posts}
+    ), 'Нужен один UPDATE на каждое различное приращение.'
+    for post in posts:
+        post.refresh_from_db()
+        assert post.views == post.pk % 3 + 1
+    content = client.get(f'/posts/{posts[0].pk}/').content.decode()
+    assert f'Просмотры: {posts[0].views}' in content
+
+
+def test_full_buffer_wakes_flusher_and_edit_keeps_views(
+        user_client: Client, post_with_published_location):
+    post = post_with_published_location
+    with override_settings(VIEW_COUNTERS={
+        'FLUSH_INTERVAL': None, 'FLUSH_SIZE': 2,
+    }), CaptureQueriesContext(connection) as context:
+        post_views.incr(post.pk)
+        post_views.incr(post.pk)
+    assert not context.captured_queries and post_views.wake.is_set(), (
+        'Переполненный буфер сбрасывает фоновый поток, а не запрос.'
+    )
+    post_views.wake.clear()
+    post_views.flush()
+    response = user_client.post(f'/posts/{post.pk}/edit/', {
+        'title': 'Новый заголовок',
+        'text': post.text,
+        'pub_date': post.pub_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'category': post.category_id,
+    })
+    assert response.status_code == 302
+    post.refresh_from_db()
+    assert (post.title, post.views) == ('Новый заголовок', 2), (
+        'Правка поста не должна затирать сброшенные просмотры.'
+    )
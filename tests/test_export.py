@@ -0,0 +1,38 @@
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_stream_export_resume(tmp_path, many_posts_with_published_locations):
+    posts = sorted(many_posts_with_published_locations, key=lambda p: p.pk)
+    path = tmp_path / 'posts.jsonl'
+    call_command('stream_export', 'post', output=str(path),
+                 until_pk=posts[4].pk)
+    with open(path, 'a', encoding='utf-8') as fh:
+        fh.write('{"id": 999, "tit')
+    call_command('stream_export', 'post', output=str(path), resume=True)
+    ids = [json.loads(line)['id'] for line in path.read_text().splitlines()]
+    assert ids == [post.pk for post in posts], (
+        'Убедитесь, что экспорт продолжается с последней полной строки.'
+    )
+    with pytest.raises(CommandError):
+        call_command('stream_export', 'post', output=str(path), resume=True,
+                     after_pk=posts[0].pk)
+    stderr = io.StringIO()
+    call_command('stream_export', 'post', output=str(tmp_path / 'new.jsonl'),
+                 resume=True, stderr=stderr)
+    assert 'с начала' in stderr.getvalue()
+
+
+def test_stream_export_csv(tmp_path, post_with_published_location):
+    path = tmp_path / 'posts.csv'
+    call_command('stream_export', 'post', format='csv', output=str(path))
+    lines = path.read_text().splitlines()
+    assert lines[0].startswith('id,title')
+    assert lines[1].startswith(str(post_with_published_location.pk))
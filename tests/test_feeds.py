@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.mark.parametrize('kind', ['rss', 'atom'])
+def test_feeds_show_published_posts(
+        client: Client, kind, user, post_with_published_location,
+        posts_with_unpublished_category, future_posts):
+    post = post_with_published_location
+    for url in (
+        f'/feeds/{kind}/',
+        f'/feeds/category/{post.category.slug}/{kind}/',
+        f'/feeds/profile/{user.username}/{kind}/',
+    ):
+        response = client.get(url)
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert post.title in content
+        for hidden in posts_with_unpublished_category + future_posts:
+            assert hidden.title not in content, (
+                f'Лента `{url}` должна показывать только опубликованные посты.'
+            )
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(
+        f'/feeds/category/{post.category.slug}/{kind}/'
+    ).status_code == 404
+
+
+def test_feed_conditional_get(
+        client: Client, mixer, post_with_published_location):
+    url = '/feeds/rss/'
+    response = client.get(url)
+    etag, last_modified = response['ETag'], response['Last-Modified']
+    for headers in (
+        {'HTTP_IF_NONE_MATCH': etag},
+        {'HTTP_IF_MODIFIED_SINCE': last_modified},
+    ):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, **headers)
+        assert response.status_code == 304
+        assert not context.captured_queries, (
+            'Ответ 304 на условный GET ленты не должен обращаться к БД.'
+        )
+    post = post_with_published_location
+    post.title = 'Новый заголовок'
+    post.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert 'Новый заголовок' in response.content.decode()
+
+
+def test_feed_cache_per_host_and_last_modified(
+        client: Client, post_with_published_location):
+    post = post_with_published_location
+    post.pub_date = timezone.now() - timedelta(days=2)
+    post.save()
+    response = client.get('/feeds/rss/')
+    assert response['Last-Modified'] == http_date(
+        post.updated_at.timestamp()
+    ), 'Last-Modified ленты должен учитывать правки постов.'
+    content = client.get(
+        '/feeds/rss/', HTTP_HOST='localhost'
+    ).content.decode()
+    assert f'http://localhost/posts/{post.pk}/' in content, (
+        'Ленты разных хостов не должны делить кеш.'
+    )
@@ -0,0 +1,27 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+SCALE = dict(users=5, categories=2, locations=3, posts=30, comments=60,
+             batch_size=7, now='2023-01-01T00:00:00+00:00')
+
+
+def _generate(prefix):
+    call_command('generate_data', prefix=prefix, **SCALE)
+    posts = Post.objects.filter(author__username__startswith=prefix)
+    return list(posts.order_by('pk').values_list('title', 'pub_date'))
+
+
+def test_generate_data_is_deterministic():
+    first = _generate('one')
+    second = _generate('two')
+    assert len(first) == SCALE['posts']
+    assert first == second, (
+        'Убедитесь, что при одинаковом seed генерируются одинаковые данные.'
+    )
+    assert Comment.objects.exists()
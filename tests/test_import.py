@@ -0,0 +1,100 @@
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.management.commands.stream_loaddata import iter_json_array
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True)
+]
+
+
+def test_iter_json_array_small_chunks():
+    items = [{'pk': i, 'text': 'x' * i, 'nested': [1, {'a': ']'}]}
+             for i in range(20)]
+    stream = io.StringIO(json.dumps(items, indent=2))
+    assert list(iter_json_array(stream, chunk_size=7)) == items
+    for text, message in (
+        ('[{"pk": 1}, {"pk"', 'Повреждённый JSON в конце файла.'),
+        ('[{"pk": 1}, ', 'Неожиданный конец файла.'),
+    ):
+        with pytest.raises(CommandError, match=message):
+            list(iter_json_array(io.StringIO(text), chunk_size=4))
+
+
+def test_stream_loaddata(tmp_path, user):
+    fixture = [
+        {'model': 'blog.post', 'pk': 10, 'fields': {
+            'title': 'Пост', 'text': 'Текст', 'author': user.pk,
+            'category': 5, 'location': None, 'is_published': True,
+            'pub_date': '2022-12-18T23:00:00Z',
+            'created_at': '2022-12-18T23:00:00Z', 'image': ''}},
+        {'model': 'blog.category', 'pk': 5, 'fields': {
+            'title': 'Категория', 'description': 'Описание', 'slug': 'cat',
+            'is_published': True, 'created_at': '2022-12-18T22:00:00Z'}},
+    ]
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(fixture), encoding='utf-8')
+    call_command('stream_loaddata', str(path), batch_size=1)
+
+    from blog.models import Post
+    post = Post.objects.get(pk=10)
+    assert post.category.slug == 'cat'
+    assert post.created_at.year == 2022, (
+        'Убедитесь, что при загрузке сохраняются даты из дампа.'
+    )
+
+
+def test_bulk_insert_keeps_given_dates(user, mixer):
+    from blog.models import Post
+    from core.bulk import bulk_insert
+    category = mixer.blend('blog.Category', is_published=True)
+    given = datetime(2022, 12, 18, tzinfo=timezone.utc)
+    posts = [Post(
+        title=str(i), text='Текст', author=user, category=category,
+        pub_date=given, created_at=given if i else None,
+    ) for i in range(3)]
+    with CaptureQueriesContext(connection) as context:
+        pks = bulk_insert(Post, posts, batch_size=2)
+    assert not any(
+        query['sql'].startswith('UPDATE')
+        for query in context.captured_queries
+    ), 'Заданные даты должны попадать в сам INSERT.'
+    other = mixer.blend('blog.Post', author=user, category=category)
+    assert other.updated_at > given, (
+        'Обычное сохранение должно заполнять auto_now как прежде.'
+    )
+    assert pks == [post.pk for post in posts]
+    created = dict(Post.objects.filter(pk__in=pks).values_list(
+        'title', 'created_at'
+    ))
+    assert created['1'] == created['2'] == given
+    assert created['0'] > given
+
+
+def test_stream_loaddata_existing_rows(tmp_path, mixer):
+    category = mixer.blend('blog.Category', title='Старое название')
+    path = tmp_path / 'dump.jsonl'
+    path.write_text('\n'.join(json.dumps(record) for record in [
+        {'model': 'blog.location', 'pk': 7, 'fields': {
+            'name': 'Место', 'is_published': True,
+            'created_at': '2022-12-18T22:00:00Z'}},
+        {'model': 'blog.category', 'pk': category.pk, 'fields': {
+            'title': 'Новое', 'description': '', 'slug': 'new',
+            'is_published': True, 'created_at': '2022-12-18T22:00:00Z'}},
+    ]), encoding='utf-8')
+    with pytest.raises(CommandError, match='--ignore-conflicts'):
+        call_command('stream_loaddata', str(path), batch_size=1)
+    from blog.models import Category, Location
+    assert Location.objects.filter(pk=7).exists(), (
+        'Пачки фиксируются по отдельности: загруженные до ошибки остаются.'
+    )
+    Location.objects.all().delete()
+    call_command('stream_loaddata', str(path), ignore_conflicts=True)
+    assert Category.objects.get(pk=category.pk).title == 'Старое название'
+    assert Location.objects.filter(pk=7).exists()
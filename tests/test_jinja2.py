@@ -0,0 +1,54 @@
+import re
+
+import pytest
+from django.test import Client
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+JINJA2_VIEWS = ('index', 'category_posts', 'profile', 'post_detail')
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]+"')
+
+
+def _render_both(client: Client, url: str, settings):
+    settings.JINJA2_VIEWS = ()
+    django_response = client.get(url)
+    settings.JINJA2_VIEWS = JINJA2_VIEWS
+    jinja2_response = client.get(url)
+    assert django_response.status_code == jinja2_response.status_code == 200
+    # Виджеты формы комментария всегда рендерятся шаблонами Django.
+    django_names = {
+        template.name for template in jinja2_response.templates
+        if not template.name.startswith(('django/', 'django_bootstrap5/'))
+    }
+    assert django_response.templates and not django_names, (
+        'Убедитесь, что для маршрутов из JINJA2_VIEWS используется Jinja2.'
+    )
+    return (
+        CSRF_TOKEN.sub(b'', django_response.content),
+        CSRF_TOKEN.sub(b'', jinja2_response.content),
+    )
+
+
+@pytest.mark.parametrize('url_template', [
+    '/',
+    '/?page=2',
+    '/category/{post.category.slug}/',
+    '/profile/{post.author.username}/',
+    '/posts/{post.id}/',
+])
+@pytest.mark.parametrize('client_fixture', ['client', 'user_client'])
+def test_jinja2_parity(
+        request, settings, mixer, client_fixture, url_template,
+        many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    post.text = 'Строка с <b>разметкой</b> & "кавычками" \'апострофами\'\nещё'
+    post.save()
+    mixer.cycle(2).blend('blog.Comment', post=post, author=post.author)
+    client = request.getfixturevalue(client_fixture)
+    django_html, jinja2_html = _render_both(
+        client, url_template.format(post=post), settings)
+    assert django_html == jinja2_html, (
+        'Убедитесь, что шаблоны Jinja2 дают тот же вывод, что и шаблоны Django.'
+    )
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True)
+]
+
+
+def test_loadtest_report(tmp_path, post_with_published_location):
+    # Тестовая БД SQLite в памяти с общим кешем блокирует таблицы и для
+    # читателей, поэтому проверяем отчёт в одном потоке.
+    output = tmp_path / 'load.json'
+    call_command('loadtest', duration=0.5, threads=1,
+                 mix='index=1,detail=1,comment=1', output=str(output))
+    report = json.loads(output.read_text())
+    assert report['requests'] > 0
+    assert set(report['kinds']) <= {'index', 'detail', 'comment'}
+    for row in report['kinds'].values():
+        assert row['error_rate'] == 0, (
+            'Убедитесь, что запросы нагрузочного теста выполняются без ошибок.'
+        )
+    assert sum(report['histogram'].values()) == report['requests']
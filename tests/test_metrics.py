@@ -0,0 +1,46 @@
+import pytest
+
+from core import metrics
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture(autouse=True)
+def sample_every_request(settings):
+    settings.TEMPLATE_TIMING = {'SAMPLE_RATE': 1.0, 'LOG_THRESHOLD_MS': 0}
+    metrics.reset()
+
+
+def test_template_timings_collected(
+        client, many_posts_with_published_locations):
+    client.get('/')
+    timings = metrics.summaries()
+    for template in ('blog/index.html', 'base.html',
+                     'includes/header.html', 'includes/paginator.html'):
+        assert f'template_render_ms{{template="{template}"}}' in timings, (
+            f'Убедитесь, что замеряется рендеринг шаблона `{template}`.'
+        )
+    renders = metrics.snapshot()
+    assert renders['template_renders{template="includes/post_card.html"}'] == (
+        10
+    )
+    assert 'template_render_ms{template="tag:bootstrap_css"}' in timings
+
+
+def test_metrics_endpoint(client, admin_client):
+    client.get('/', REMOTE_ADDR='10.0.0.1')
+    assert client.get('/metrics/', REMOTE_ADDR='10.0.0.1').status_code == 403
+    response = admin_client.get('/metrics/')
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert 'template_request_ms_count' in content
+    for line in (
+        '# TYPE template_request_ms summary',
+        '# TYPE template_request_ms_max gauge',
+        '# TYPE template_renders counter',
+    ):
+        assert line in content.splitlines(), (
+            'Вывод Prometheus должен объявлять тип каждой метрики.'
+        )
@@ -0,0 +1,97 @@
+import base64
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def _items(category, location):
+    return [
+        {'title': 'Первый', 'text': 'Текст', 'pub_date': '2023-01-01T10:00',
+         'category': category.slug, 'location': location.name},
+        {'title': '', 'text': 'Без заголовка', 'pub_date': '2023-01-01T10:00',
+         'category': category.slug},
+        {'title': 'Чужая категория', 'text': 'Текст',
+         'pub_date': '2023-01-01T10:00', 'category': 'no-such-slug'},
+        {'title': 'Второй', 'text': 'Текст', 'pub_date': '2023-01-02T10:00',
+         'category': category.slug},
+    ]
+
+
+def test_import_endpoint(
+        client: Client, user, published_category, published_location):
+    user.set_password('secret')
+    user.save()
+    url = '/api/posts/import/'
+    items = _items(published_category, published_location)
+    assert client.post(
+        url, json.dumps(items), content_type='application/json'
+    ).status_code == 401
+    auth = base64.b64encode(f'{user.username}:secret'.encode()).decode()
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            url, json.dumps(items), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Basic {auth}',
+        )
+    assert response.status_code == 200
+    data = response.json()
+    assert data['created'] == 2
+    results = data['results']
+    assert 'title' in results[1]['errors']
+    assert 'category' in results[2]['errors']
+    first, second = Post.objects.get(pk=results[0]['id']), Post.objects.get(
+        pk=results[3]['id'])
+    assert (first.title, first.author, first.location) == (
+        'Первый', user, published_location)
+    assert second.title == 'Второй'
+    inserts = [query for query in context.captured_queries
+               if query['sql'].startswith('INSERT INTO "blog_post"')]
+    lookups = [query for query in context.captured_queries
+               if 'FROM "blog_category"' in query['sql']
+               or 'FROM "blog_location"' in query['sql']]
+    assert len(inserts) == 1 and len(lookups) == 2, (
+        'Пакет должен вставляться одним bulk_create, а категории и '
+        'местоположения — разрешаться одним запросом каждые.'
+    )
+
+
+def test_session_import_checks_csrf(user, published_category,
+                                    published_location):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(user)
+    items = json.dumps(_items(published_category, published_location))
+    response = client.post(
+        '/api/posts/import/', items, content_type='application/json'
+    )
+    assert response.status_code == 403, (
+        'Импорт с сессией должен проверять CSRF.'
+    )
+    client.get('/posts/create/')
+    response = client.post(
+        '/api/posts/import/', items, content_type='application/json',
+        HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value,
+    )
+    assert response.json()['created'] == 2
+
+
+def test_import_command(tmp_path, user, published_category,
+                        published_location):
+    path = tmp_path / 'posts.jsonl'
+    path.write_text('\n'.join(
+        json.dumps(item) for item in _items(
+            published_category, published_location)
+    ))
+    call_command('import_posts', str(path), author=user.username,
+                 batch_size=3)
+    assert set(Post.objects.values_list('title', flat=True)) == {
+        'Первый', 'Второй'
+    }
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Category
+from blog.registry import categories
+from core import registry
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def _lookup_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "blog_category"' in query['sql']
+        or 'FROM "blog_location"' in query['sql']
+    ]
+
+
+def test_category_page_uses_registry(
+        client: Client, many_posts_with_published_locations):
+    category = many_posts_with_published_locations[0].category
+    url = f'/category/{category.slug}/'
+    assert _lookup_queries(client, url)
+    assert _lookup_queries(client, url) == [], (
+        'Повторный запрос не должен читать категории и местоположения из БД.'
+    )
+    category.is_published = False
+    category.save()
+    assert client.get(url).status_code == 404, (
+        'Снятая с публикации категория должна пропасть со следующего запроса.'
+    )
+
+
+def test_other_worker_sees_invalidation(post_with_published_location):
+    category = post_with_published_location.category
+    other = registry.Registry('category', Category, fields=('pk', 'slug'))
+    try:
+        with registry.request_scope():
+            assert other.get(pk=category.pk).title == category.title
+        category.title = 'Новое название'
+        category.save()
+        with registry.request_scope():
+            assert other.get(pk=category.pk).title == 'Новое название', (
+                'Изменение в другом воркере должно быть видно в следующем '
+                'запросе.'
+            )
+    finally:
+        registry._registries.remove(other)
+
+
+def test_registry_lru_bounded(mixer):
+    items = mixer.cycle(3).blend('blog.Category')
+    bounded = registry.Registry('bounded', Category, maxsize=2)
+    try:
+        for item in items:
+            assert bounded.get(pk=item.pk) == item
+        assert len(bounded.local) == 2
+        assert bounded.get(pk=0) is None
+        with pytest.raises(ValueError):
+            bounded.get(slug=items[0].slug)
+    finally:
+        registry._registries.remove(bounded)
+    assert categories.get(slug=items[0].slug) == items[0]
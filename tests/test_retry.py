@@ -0,0 +1,55 @@
+import pytest
+from django.db import OperationalError
+
+from core import metrics
+from core.retry import retry_write
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True)
+]
+
+
+@pytest.fixture(autouse=True)
+def fast_retry(settings):
+    settings.WRITE_RETRY = {
+        'ATTEMPTS': 3, 'BASE_DELAY': 0.001, 'MAX_DELAY': 0.01, 'DEADLINE': 1,
+    }
+    metrics.reset()
+
+
+def test_retry_on_locked_database():
+    calls = []
+
+    @retry_write(name='flaky')
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError('database is locked')
+        return 'ok'
+
+    assert flaky() == 'ok'
+    assert metrics.snapshot()['write_retry.flaky.retries'] == 2
+
+
+def test_no_retry_on_other_errors():
+    calls = []
+
+    @retry_write(name='broken')
+    def broken():
+        calls.append(1)
+        raise OperationalError('no such table: blog_post')
+
+    with pytest.raises(OperationalError):
+        broken()
+    assert len(calls) == 1
+
+
+def test_gives_up_after_attempts():
+
+    @retry_write(name='locked')
+    def locked():
+        raise OperationalError('database is locked')
+
+    with pytest.raises(OperationalError):
+        locked()
+    assert metrics.snapshot()['write_retry.locked.failed'] == 1
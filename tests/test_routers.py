@@ -0,0 +1,48 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.registry import categories
+from core.routers import (
+    PrimaryReplicaRouter, pinned_to_primary, replica_reads)
+
+
+@pytest.fixture
+def replica_settings(settings):
+    settings.DATABASES = {
+        **settings.DATABASES, 'replica': settings.DATABASES['default']}
+    settings.DATABASE_REPLICAS = ['replica']
+    return settings
+
+
+def test_reads_go_to_replica_only_when_enabled(replica_settings):
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Post) is None
+    with replica_reads():
+        assert router.db_for_read(Post) == 'replica'
+        with pinned_to_primary():
+            assert router.db_for_read(Post) is None
+    assert router.db_for_write(Post) == DEFAULT_DB_ALIAS
+
+
+@pytest.mark.django_db
+def test_write_pins_client_to_primary(user_client, settings):
+    response = user_client.post('/edit_profile/', data={})
+    cookie = response.cookies.get(settings.READ_YOUR_WRITES_COOKIE)
+    assert cookie is not None, (
+        'Убедитесь, что после записи клиент закрепляется за основной БД.'
+    )
+    assert cookie['max-age'] == settings.READ_YOUR_WRITES_WINDOW
+
+
+@pytest.mark.django_db
+def test_registry_miss_reads_primary(
+        replica_settings, post_with_published_location):
+    category = post_with_published_location.category
+    with replica_reads(), CaptureQueriesContext(connection) as context:
+        assert categories.get(pk=category.pk) == category
+    assert any(
+        'FROM "blog_category"' in query['sql']
+        for query in context.captured_queries
+    ), 'Справочник без срока жизни не должен заполняться с реплики.'
@@ -0,0 +1,92 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import sitemaps
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def _content(response):
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode()
+
+
+def _crawl(client):
+    index = _content(client.get('/sitemap.xml'))
+    urls = []
+    for loc in re.findall(r'<loc>http://testserver(/[^<]+)</loc>', index):
+        with CaptureQueriesContext(connection) as context:
+            urls += re.findall(
+                r'<loc>http://testserver([^<]+)</loc>',
+                _content(client.get(loc)),
+            )
+        assert not any(
+            'OFFSET' in query['sql'] for query in context.captured_queries
+        ), 'Шарды карты сайта должны читаться по keyset, без OFFSET.'
+    return index, urls
+
+
+def test_sitemap_shards(
+        client: Client, monkeypatch, many_posts_with_published_locations,
+        posts_with_unpublished_category, future_posts):
+    monkeypatch.setattr(sitemaps, 'SHARD_SIZE', 4)
+    monkeypatch.setattr(sitemaps, 'CHUNK_SIZE', 3)
+    posts = many_posts_with_published_locations
+    index, urls = _crawl(client)
+    assert '<lastmod>' in index
+    assert sorted(url for url in urls if url.startswith('/posts/')) == sorted(
+        f'/posts/{post.pk}/' for post in posts
+    ), 'Карта сайта должна содержать все опубликованные посты, и только их.'
+    assert f'/category/{posts[0].category.slug}/' in urls
+    assert f'/profile/{posts[0].author.username}/' in urls
+    assert client.get('/sitemap-unknown-0.xml').status_code == 404
+    assert client.get('/sitemap-posts-999.xml').status_code == 404, (
+        'Шард за концом раздела должен отдавать 404, а не пустой urlset.'
+    )
+
+
+def test_sitemap_precomputed(
+        client: Client, tmp_path, monkeypatch,
+        many_posts_with_published_locations):
+    monkeypatch.setattr(sitemaps, 'SHARD_SIZE', 4)
+    call_command('build_sitemaps', base_url='http://testserver',
+                 output=str(tmp_path))
+    with override_settings(SITEMAP_DIR=str(tmp_path)):
+        with CaptureQueriesContext(connection) as context:
+            index = _content(client.get('/sitemap.xml'))
+        assert not context.captured_queries, (
+            'Готовый индекс должен отдаваться из файла без запросов к БД.'
+        )
+        index, urls = _crawl(client)
+    assert len([url for url in urls if url.startswith('/posts/')]) == len(
+        many_posts_with_published_locations
+    )
+
+
+def test_category_lastmod_skips_hidden_posts(
+        mixer, user, published_category):
+    now = timezone.now()
+    visible = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=now - timedelta(days=1),
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=now + timedelta(days=1),
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False, pub_date=now - timedelta(days=1),
+    )
+    assert sitemaps.CategorySection().shards() == [
+        (0, visible.updated_at)
+    ], 'lastmod категории должен учитывать только видимые посты.'
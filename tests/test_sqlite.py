@@ -0,0 +1,44 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_pragmas_applied():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA busy_timeout;')
+        busy_timeout = cursor.fetchone()[0]
+    assert busy_timeout == 5000, (
+        'Убедитесь, что к соединению SQLite применяется профиль PRAGMA.'
+    )
+
+
+def test_db_health(client):
+    assert client.get(
+        '/health/db/', REMOTE_ADDR='203.0.113.1'
+    ).status_code == HTTPStatus.FORBIDDEN, (
+        'Проверка состояния БД должна быть доступна только служебным '
+        'адресам и персоналу.'
+    )
+    response = client.get('/health/db/')
+    assert response.status_code == HTTPStatus.OK
+    stats = response.json()
+    for key in ('wal_size', 'page_count', 'freelist_count', 'page_size'):
+        assert key in stats, (
+            f'Убедитесь, что проверка состояния БД сообщает `{key}`.'
+        )
+
+
+def test_sqlite_maintenance_command(capsys):
+    call_command('sqlite_maintenance', analyze=True, health=True)
+    assert 'analyze: ok' in capsys.readouterr().out
+
+
+def test_vacuum_requires_incremental_mode():
+    with pytest.raises(CommandError):
+        call_command('sqlite_maintenance', vacuum_pages=0)
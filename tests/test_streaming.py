@@ -0,0 +1,59 @@
+import re
+
+import pytest
+from django.test import Client
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+STREAMING_VIEWS = ('index', 'category_posts', 'profile')
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+
+
+def _normalize(html: str) -> str:
+    html = CSRF_TOKEN.sub('', html)
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+@pytest.mark.parametrize('url_template', [
+    '/',
+    '/?page=2',
+    '/category/{post.category.slug}/',
+    '/profile/{post.author.username}/',
+])
+@pytest.mark.parametrize('jinja2_views', [(), STREAMING_VIEWS])
+def test_streaming_matches_regular_render(
+        settings, user_client: Client, url_template, jinja2_views,
+        many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    url = url_template.format(post=post)
+    settings.JINJA2_VIEWS = jinja2_views
+    regular = user_client.get(url)
+    settings.STREAMING_VIEWS = STREAMING_VIEWS
+    streamed = user_client.get(url)
+    assert not regular.streaming and streamed.streaming, (
+        'Убедитесь, что маршруты из STREAMING_VIEWS отдаются потоком.'
+    )
+    assert streamed.status_code == 200
+    chunks = [chunk.decode() for chunk in streamed.streaming_content]
+    assert '<header' in chunks[0] and '<article' not in chunks[0], (
+        'Начало страницы должно отправляться до карточек постов.'
+    )
+    assert _normalize(''.join(chunks)) == _normalize(
+        regular.content.decode()
+    ), 'Потоковая и обычная отдача должны давать одинаковую страницу.'
+
+
+def test_streaming_head_sent_before_posts_query(
+        settings, client: Client, django_assert_num_queries,
+        many_posts_with_published_locations):
+    client.get('/')  # Заполняет справочники категорий и местоположений.
+    settings.STREAMING_VIEWS = STREAMING_VIEWS
+    response = client.get('/')
+    chunks = iter(response.streaming_content)
+    head = next(chunks).decode()
+    assert '<header' in head and '<article' not in head
+    with django_assert_num_queries(1):
+        article = next(chunks).decode()
+    assert article.lstrip().startswith('<article')
@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog import timeline
+from blog.models import Post, TimelineEntry
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def _timeline(client, url='/timeline/'):
+    pks = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pks += [post.pk for post in response.context['object_list']]
+        cursor = response.context['next_cursor']
+        url = cursor and f'/timeline/?cursor={cursor}'
+    return pks
+
+
+def test_follow_fan_out_and_keyset_pages(
+        user, another_user_client: Client, another_user, mixer,
+        published_category, django_capture_on_commit_callbacks):
+    followed = another_user_client.post(f'/profile/{user.username}/follow/')
+    assert followed.status_code == 302
+    stranger = mixer.blend('auth.User')
+    with django_capture_on_commit_callbacks(execute=True):
+        posts = mixer.cycle(12).blend(
+            'blog.Post', author=user, category=published_category,
+            is_published=True,
+        )
+        mixer.blend('blog.Post', author=stranger, category=published_category)
+    expected = [post.pk for post in sorted(
+        posts, key=lambda post: (post.pub_date, post.pk), reverse=True)]
+    with CaptureQueriesContext(connection) as context:
+        assert _timeline(another_user_client) == expected, (
+            'Лента подписок должна содержать посты автора по убыванию даты.'
+        )
+    assert not any(
+        'OFFSET' in query['sql'] for query in context.captured_queries
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[0].is_published = False
+        posts[0].save()
+    assert posts[0].pk not in _timeline(another_user_client)
+    another_user_client.post(f'/profile/{user.username}/unfollow/')
+    assert _timeline(another_user_client) == []
+    assert not TimelineEntry.objects.exists()
+
+
+def test_cap_and_heavy_authors(
+        user, another_user, another_user_client: Client,
+        many_posts_with_published_locations):
+    with override_settings(TIMELINE={'MAX_ENTRIES': 5}):
+        timeline.follow(another_user, user)
+        assert TimelineEntry.objects.filter(user=another_user).count() == 5
+    TimelineEntry.objects.all().delete()
+    with override_settings(TIMELINE={'FANOUT_LIMIT': 0}):
+        timeline.check_heavy(user.pk)
+        post = Post.objects.published().filter(author=user).latest(
+            'pub_date')
+        timeline.fan_out([post])
+        assert not TimelineEntry.objects.exists(), (
+            'Посты авторов с множеством подписчиков не раскладываются.'
+        )
+        assert len(_timeline(another_user_client)) == len(
+            many_posts_with_published_locations
+        ), 'Посты таких авторов должны читаться при открытии ленты.'
+
+
+def test_only_newly_visible_posts_fan_out(
+        user, another_user, mixer, published_category,
+        django_capture_on_commit_callbacks):
+    timeline.follow(another_user, user)
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            is_published=True,
+        )
+    TimelineEntry.objects.all().delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = 'Новый заголовок'
+        post.save()
+    assert not TimelineEntry.objects.exists(), (
+        'Правка уже разложенного поста не должна раскладывать его заново.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        post.is_published = False
+        post.save()
+        post.is_published = True
+        post.save()
+    assert TimelineEntry.objects.filter(post=post).count() == 1
+
+
+def test_author_below_limit_is_backfilled(
+        user, another_user, mixer, published_category,
+        django_capture_on_commit_callbacks):
+    third = mixer.blend('auth.User')
+    with override_settings(TIMELINE={'FANOUT_LIMIT': 1}):
+        timeline.follow(another_user, user)
+        timeline.follow(third, user)
+        with django_capture_on_commit_callbacks(execute=True):
+            post = mixer.blend(
+                'blog.Post', author=user, category=published_category,
+                is_published=True,
+            )
+        assert not TimelineEntry.objects.filter(post=post).exists()
+        with django_capture_on_commit_callbacks(execute=True):
+            timeline.unfollow(third, user)
+    assert TimelineEntry.objects.filter(
+        user=another_user, post=post
+    ).exists(), (
+        'Посты, вышедшие, пока у автора было много подписчиков, должны '
+        'попасть в ленты, когда подписчиков стало меньше предела.'
+    )
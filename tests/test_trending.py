@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog import trending
+from blog.counters import post_views
+from blog.models import TrendingPost
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+DAY = trending.config()['GENERATION']
+HALF_LIFE = trending.config()['HALF_LIFE']
+
+
+def test_decay_and_generations(many_posts_with_published_locations):
+    old, new, other = many_posts_with_published_locations[:3]
+    start = 100 * DAY
+    trending.record({old.pk: 4}, now=start)
+    trending.record({new.pk: 3}, now=start + 2 * HALF_LIFE)
+    ranked = list(trending.top(now=start + 2 * HALF_LIFE))
+    assert ranked == [new, old], (
+        'Старое событие должно затухать вдвое за период полураспада.'
+    )
+    # Новое поколение: оценки переносятся с тем же соотношением.
+    later = start + DAY + HALF_LIFE
+    trending.record({other.pk: 1}, now=later)
+    # Вес 4 прошёл 5 периодов полураспада, вес 3 — три.
+    assert list(trending.top(now=later)) == [other, new, old]
+    scores = dict(TrendingPost.objects.values_list('post_id', 'score'))
+    assert scores[new.pk] / scores[old.pk] == pytest.approx(3)
+    with CaptureQueriesContext(connection) as context:
+        ranked = list(trending.top(now=start + 2 * DAY))
+    assert ranked == [other, new, old]
+    assert all(
+        query['sql'].startswith('SELECT')
+        for query in context.captured_queries
+    ), 'Чтение популярного не должно писать в БД.'
+    trending.rollover(now=start + 3 * DAY)
+    assert not TrendingPost.objects.exists()
+
+
+def test_trending_page(
+        client: Client, django_capture_on_commit_callbacks, mixer,
+        many_posts_with_published_locations, posts_with_unpublished_category):
+    quiet, viewed, discussed = many_posts_with_published_locations[:3]
+    hidden = posts_with_unpublished_category[0]
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.cycle(2).blend('blog.Comment', post=discussed)
+        mixer.blend('blog.Comment', post=hidden)
+    for _ in range(3):
+        post_views.incr(viewed.pk)
+    post_views.flush()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/trending/')
+    assert not any(
+        'GROUP BY' in query['sql'] and 'blog_trendingpost' not in query['sql']
+        for query in context.captured_queries
+    )
+    posts = list(response.context['post_list'])
+    assert posts == [discussed, viewed], (
+        'Популярное должно показывать опубликованные посты по убыванию '
+        'оценки.'
+    )